@@ -0,0 +1,94 @@
+"""Converter lookups: decoding a poll and encoding a write on a device with 100 converters."""
+from types import SimpleNamespace
+
+from custom_components.xiaomi_miot.core.converters import BaseConv
+from custom_components.xiaomi_miot.core.device import Device, DeviceInfo
+from custom_components.xiaomi_miot.core.miot_spec import MiotSpec
+from custom_components.xiaomi_miot.core.utils import get_value
+from .common import header, measure, report
+
+
+class LegacyDevice(Device):
+    """Converter lookups before the indexes, a linear scan of all converters."""
+
+    def find_converter(self, full_name):
+        for c in self.converters:
+            if c.full_name == full_name:
+                return c
+        return None
+
+    def decode_one(self, payload: dict, value: dict):
+        if value.get('code', 0):
+            return
+        siid = value.get('siid')
+        piid = value.get('piid')
+        if siid and piid:
+            mi = MiotSpec.unique_prop(siid, piid=piid)
+            for conv in self.converters:
+                if conv.mi == mi:
+                    conv.decode(self, payload, value.get('value'))
+
+    def decode_attrs(self, value: dict):
+        payload = {}
+        for conv in self.converters:
+            val = get_value(value, conv.attr, None, ':')
+            if val is not None:
+                conv.decode(self, payload, val)
+        return payload
+
+    def encode(self, value: dict) -> dict:
+        payload = {}
+        for k, v in value.items():
+            for conv in self.converters:
+                if conv.full_name == k:
+                    conv.encode(self, payload, v)
+        return payload
+
+
+def create(cls, count):
+    info = DeviceInfo({'did': '123456', 'model': 'bench.device.v1', 'name': 'Bench'})
+    device = cls(info, SimpleNamespace(hass=None, cloud=None))
+    for i in range(count):
+        siid, piid = 2 + i // 10, 1 + i % 10
+        device.add_converter(BaseConv(f'prop_{siid}_{piid}', 'sensor', mi=f'prop.{siid}.{piid}'))
+    return device
+
+
+def main():
+    count = 100
+    old, new = create(LegacyDevice, count), create(Device, count)
+    results = [
+        {'did': '123456', 'siid': 2 + i // 10, 'piid': 1 + i % 10, 'code': 0, 'value': i}
+        for i in range(count)
+    ]
+    attrs = {f'prop_{2 + i // 10}_{1 + i % 10}': i for i in range(0, count, 4)}
+    writes = {f'sensor.prop_{2 + i // 10}_{1 + i % 10}': i for i in range(0, count, 20)}
+    assert old.decode(results) == new.decode(results)
+    assert old.decode_attrs(attrs) == new.decode_attrs(attrs)
+    assert old.encode(writes) == new.encode(writes)
+
+    header(f'Converter lookups, {count} converters')
+    report(
+        f'decode a poll of {len(results)} properties',
+        measure(lambda: old.decode(results), 200),
+        measure(lambda: new.decode(results), 200),
+    )
+    report(
+        f'decode_attrs of {len(attrs)} attrs',
+        measure(lambda: old.decode_attrs(attrs), 200),
+        measure(lambda: new.decode_attrs(attrs), 200),
+    )
+    report(
+        f'encode a write of {len(writes)} values',
+        measure(lambda: old.encode(writes)),
+        measure(lambda: new.encode(writes)),
+    )
+    report(
+        'find_converter of the last converter',
+        measure(lambda: old.find_converter('sensor.prop_11_10')),
+        measure(lambda: new.find_converter('sensor.prop_11_10')),
+    )
+
+
+if __name__ == '__main__':
+    main()
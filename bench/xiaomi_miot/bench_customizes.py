@@ -0,0 +1,101 @@
+"""Customize resolution: merging DEVICE_CUSTOMIZES for a model and for the keys of an entity."""
+import re
+
+from homeassistant.helpers.entity import Entity
+
+from custom_components.xiaomi_miot.core.const import DEVICE_CUSTOMIZES
+from custom_components.xiaomi_miot.core.utils import (
+    clear_customizes_cache,
+    get_customize_via_entity,
+    get_customize_via_model,
+    wildcard_models,
+)
+from .common import header, measure, report
+
+
+def legacy_wildcard_models(model):
+    if not model:
+        return []
+    if ':' in model:
+        return [model]
+    wil = re.sub(r'\.[^.]+$', '.*', model)
+    return [
+        model,
+        wil,
+        re.sub(r'^[^.]+\.', '*.', wil),
+        '*',
+    ]
+
+
+def legacy_customize_via_model(model, key=None, default=None):
+    cfg = {}
+    for m in legacy_wildcard_models(model):
+        cus = DEVICE_CUSTOMIZES.get(m) or {}
+        if key is not None and key not in cus:
+            continue
+        if cus:
+            cfg = {**cus, **cfg}
+    return cfg if key is None else cfg.get(key, default)
+
+
+def legacy_customize_via_entity(entity, key=None, default=None):
+    if key is None:
+        default = {}
+    cfg = {}
+    mls = [*entity.customize_keys, entity.model]
+    for mod in mls:
+        cus = legacy_customize_via_model(mod)
+        cfg = {**cus, **cfg}
+    return cfg if key is None else cfg.get(key, default)
+
+
+class BenchEntity(Entity):
+    """An entity of a property, with the customize keys XEntity builds for it."""
+
+    def __init__(self, model, prop):
+        self.model = model
+        self.customize_keys = [
+            k
+            for mod in wildcard_models(model)
+            for k in (f'{mod}:{prop}', f'{mod}:{prop.split(".")[-1]}')
+        ]
+
+
+def main():
+    models = [m for m in DEVICE_CUSTOMIZES if '*' not in m and ':' not in m]
+    model = next(m for m in models if len(DEVICE_CUSTOMIZES[m]) > 3)
+    entity = BenchEntity(model, 'switch.on')
+    assert legacy_customize_via_model(model) == get_customize_via_model(model)
+    assert legacy_customize_via_entity(entity) == get_customize_via_entity(entity)
+
+    header(f'Customize resolution, {len(DEVICE_CUSTOMIZES)} customized models, model {model}')
+    report(
+        'model, one key',
+        measure(lambda: legacy_customize_via_model(model, 'chunk_properties'), 10000),
+        measure(lambda: get_customize_via_model(model, 'chunk_properties'), 10000),
+    )
+    report(
+        'model, whole dict',
+        measure(lambda: legacy_customize_via_model(model), 10000),
+        measure(lambda: get_customize_via_model(model), 10000),
+    )
+    report(
+        'entity, one key',
+        measure(lambda: legacy_customize_via_entity(entity, 'state_heartbeat'), 10000),
+        measure(lambda: get_customize_via_entity(entity, 'state_heartbeat'), 10000),
+    )
+
+    def first_lookups():
+        clear_customizes_cache()
+        for m in models[:100]:
+            get_customize_via_model(m, 'chunk_properties')
+
+    report(
+        'model, one key of 100 models after invalidation',
+        measure(lambda: [legacy_customize_via_model(m, 'chunk_properties') for m in models[:100]], 100),
+        measure(first_lookups, 100),
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Import cost of the static tables that importing the package used to load eagerly.
+
+Each sample runs in a fresh interpreter that imports the package first, then each table on its
+own, like its first use does now. The `.pyc` files are compiled by a warm-up run.
+"""
+import json
+import subprocess
+import sys
+
+
+TABLES = [
+    'custom_components.xiaomi_miot.core.device_customizes',
+    'custom_components.xiaomi_miot.core.miio2miot_specs',
+    'custom_components.xiaomi_miot.core.translation_languages',
+]
+
+SAMPLE = '''
+import importlib, json, sys, time, tracemalloc
+import custom_components.xiaomi_miot
+trace = sys.argv[1] == 'trace'
+loaded = [m for m in sys.argv[2:] if m in sys.modules]
+result = {}
+for mod in sys.argv[2:]:
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    importlib.import_module(mod)
+    if trace:
+        result[mod] = tracemalloc.get_traced_memory()[0] / 1048576
+        tracemalloc.stop()
+    else:
+        result[mod] = (time.perf_counter() - start) * 1000
+print(json.dumps({'loaded': loaded, 'result': result}))
+'''
+
+
+def sample(trace=False, repeat=5):
+    """Best of `repeat` fresh interpreters, per table import time in ms or allocated MiB."""
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, '-c', SAMPLE, 'trace' if trace else 'time', *TABLES],
+            check=True, capture_output=True, text=True,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    assert not runs[0]['loaded'], f'Imported with the package: {runs[0]["loaded"]}'
+    return {mod: min(r['result'][mod] for r in runs) for mod in TABLES}
+
+
+def main():
+    sample(repeat=1)
+    times, memory = sample(), sample(trace=True)
+    print('\nStatic tables, no longer imported with custom_components.xiaomi_miot')
+    print(f'{"":<48} {"import":>12} {"allocated":>13}')
+    for mod in TABLES:
+        print(f'{mod.rsplit(".", 1)[-1]:<48} {times[mod]:>9.2f} ms {memory[mod]:>9.2f} MiB')
+    print(f'{"total moved off the import path":<48} {sum(times.values()):>9.2f} ms {sum(memory.values()):>9.2f} MiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""miIO packet framing: per-packet cost of packing requests and unpacking replies."""
+import hashlib
+import json
+import time
+
+from cryptography.hazmat.primitives import padding
+
+from custom_components.xiaomi_miot.core.mini_miio import BasemiIO
+from .common import header, measure, report
+
+
+class LegacymiIO(BasemiIO):
+    """Framing before the preallocated packet, a padder and concatenated bytes per packet."""
+
+    def _encrypt(self, plaintext: bytes):
+        padder = padding.PKCS7(128).padder()
+        padded_plaintext = padder.update(plaintext) + padder.finalize()
+        encryptor = self.cipher.encryptor()
+        return encryptor.update(padded_plaintext) + encryptor.finalize()
+
+    def _decrypt(self, ciphertext: bytes):
+        decryptor = self.cipher.decryptor()
+        padded_plaintext = decryptor.update(ciphertext) + decryptor.finalize()
+        unpadder = padding.PKCS7(128).unpadder()
+        return unpadder.update(padded_plaintext) + unpadder.finalize()
+
+    def _pack_raw(self, msg_id: int, method: str, params=None):
+        payload = (
+            json.dumps(
+                {"id": msg_id, "method": method, "params": params or []},
+                separators=(",", ":"),
+            ).encode()
+            + b"\x00"
+        )
+        data = self._encrypt(payload)
+        raw = b"\x21\x31"
+        raw += (32 + len(data)).to_bytes(2, "big")
+        raw += b"\x00\x00\x00\x00"
+        raw += self.device_id.to_bytes(4, "big")
+        raw += int(time.time() - self.delta_ts).to_bytes(4, "big")
+        raw += hashlib.md5(raw + self.token + data).digest()
+        raw += data
+        assert len(raw) < 1024, "Exceeded message size"
+        return raw
+
+    def _unpack_raw(self, raw: bytes):
+        assert raw[:2] == b"\x21\x31"
+        return self._decrypt(raw[32:])
+
+
+def create(cls):
+    obj = cls('127.0.0.1', '00112233445566778899aabbccddeeff')
+    obj.device_id = 0x12345678
+    obj.delta_ts = 0
+    return obj
+
+
+def main():
+    old, new = create(LegacymiIO), create(BasemiIO)
+    params = [{'did': f'prop.2.{i}', 'siid': 2, 'piid': i} for i in range(1, 16)]
+    reply = json.dumps({
+        'id': 1,
+        'result': [{'did': f'prop.2.{i}', 'siid': 2, 'piid': i, 'code': 0, 'value': i * 1000} for i in range(1, 16)],
+    }).encode()
+    packet = bytes(old._pack_raw(1, 'get_properties', params))
+    # a reply of the device is framed like a request
+    reply_packet = bytes(new._pack_raw(1, 'get_properties', params))
+    reply_packet = reply_packet[:32] + new._encrypt(reply)
+    reply_packet = reply_packet[:2] + len(reply_packet).to_bytes(2, 'big') + reply_packet[4:]
+    assert old._unpack_raw(reply_packet) == bytes(new._unpack_raw(reply_packet)) == reply
+    assert len(packet) == len(new._pack_raw(1, 'get_properties', params))
+
+    header(f'miIO framing, 15 properties request ({len(packet)} B), reply {len(reply_packet)} B')
+    for count in (1000, 10000):
+        report(
+            f'pack get_properties, {count} packets',
+            measure(lambda: old._pack_raw(1, 'get_properties', params), count),
+            measure(lambda: new._pack_raw(1, 'get_properties', params), count),
+        )
+        report(
+            f'unpack reply, {count} packets',
+            measure(lambda: old._unpack_raw(reply_packet), count),
+            measure(lambda: new._unpack_raw(reply_packet), count),
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Poll decoding: time and allocations of turning a get_properties reply into attrs and converter payload.
+
+MiotResults before the single pass is loaded from git history, pass another ref as the first
+argument to compare with it.
+"""
+import sys
+import tracemalloc
+from types import SimpleNamespace
+
+from custom_components.xiaomi_miot.core import miot_spec
+from custom_components.xiaomi_miot.core.converters import BaseConv
+from custom_components.xiaomi_miot.core.device import Device, DeviceInfo
+from .common import header, load_legacy_module, measure, report
+
+# the parent of the commit decoding results in one pass
+LEGACY_REF = '3d5597e~1'
+
+
+def create_device(count):
+    info = DeviceInfo({'did': '123456', 'model': 'bench.device.v1', 'name': 'Bench'})
+    device = Device(info, SimpleNamespace(hass=None, cloud=None))
+    for i in range(count):
+        siid, piid = 2 + i // 10, 1 + i % 10
+        device.add_converter(BaseConv(f'prop_{siid}_{piid}', 'sensor', mi=f'prop.{siid}.{piid}'))
+    return device
+
+
+def legacy_poll(legacy, device, results, mapping):
+    """update_miot_status before, MiotResults wrapping every item, to_attributes and decode."""
+    attrs = {}
+    legacy.MiotResults(results, mapping).to_attributes(attrs)
+    return attrs, device.decode(results)
+
+
+def poll(device, results, mapping):
+    attrs = {}
+    miot_spec.MiotResults(results, mapping)
+    return attrs, device.decode_results(results, mapping, attrs)
+
+
+def peak(func, repeat=20):
+    """Peak KiB allocated by one call, the lowest of `repeat` calls."""
+    sizes = []
+    for _ in range(repeat):
+        tracemalloc.start()
+        func()
+        sizes.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return min(sizes) / 1024
+
+
+def main():
+    legacy = load_legacy_module(sys.argv[1] if len(sys.argv) > 1 else LEGACY_REF, miot_spec.__name__)
+    count = 100
+    device = create_device(count)
+    mapping = {
+        f'prop_{2 + i // 10}_{1 + i % 10}': {'siid': 2 + i // 10, 'piid': 1 + i % 10}
+        for i in range(count)
+    }
+    results = [
+        {'did': '123456', 'siid': 2 + i // 10, 'piid': 1 + i % 10, 'code': -4004 if i % 10 == 9 else 0, 'value': i}
+        for i in range(count)
+    ]
+    assert legacy_poll(legacy, device, results, mapping) == poll(device, results, mapping)
+
+    header(f'Poll decoding, {count} properties with {count // 10} failing, {count} converters')
+    report(
+        'time per poll',
+        measure(lambda: legacy_poll(legacy, device, results, mapping), 200),
+        measure(lambda: poll(device, results, mapping), 200),
+    )
+    report(
+        'tracemalloc peak per poll',
+        peak(lambda: legacy_poll(legacy, device, results, mapping)),
+        peak(lambda: poll(device, results, mapping)),
+        'KiB',
+    )
+
+
+if __name__ == '__main__':
+    main()
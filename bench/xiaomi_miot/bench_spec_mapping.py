@@ -0,0 +1,74 @@
+"""Spec mappings: per-poll cost of services_mapping and of the chunk_services loop on a large spec.
+
+The spec is synthetic. The spec classes before the memoized mappings are loaded from git history,
+pass another ref as the first argument to compare with it.
+"""
+import sys
+from types import SimpleNamespace
+
+from custom_components.xiaomi_miot.core import miot_spec
+from .common import header, load_legacy_module, measure, report
+
+# the parent of the commit memoizing the mappings
+LEGACY_REF = '49201fc~1'
+
+HASS = SimpleNamespace(config=SimpleNamespace(language='en'), data={})
+
+
+def spec_data(services=25, properties=20):
+    return {
+        'type': 'urn:miot-spec-v2:device:gateway:0000A019:bench:1',
+        'description': 'Gateway',
+        'services': [
+            {
+                'iid': siid,
+                'type': f'urn:miot-spec-v2:service:service-{siid}:0000{siid:04X}:bench:1',
+                'description': f'Service {siid}',
+                'properties': [
+                    {
+                        'iid': piid,
+                        'type': f'urn:miot-spec-v2:property:property-{piid}:0000{piid:04X}:bench:1',
+                        'description': f'Property {piid}',
+                        'format': 'uint8',
+                        'access': ['read', 'notify'] if piid % 5 else ['write'],
+                    }
+                    for piid in range(1, properties + 1)
+                ],
+            }
+            for siid in range(2, services + 2)
+        ],
+    }
+
+
+def chunk_services_poll(spec):
+    """The mappings update_miot_status builds per poll with chunk_services."""
+    return [
+        mapp
+        for service in spec.get_services(excludes=['service_2'])
+        if (mapp := service.mapping(excludes=['property_3'], unreadable_properties=False))
+    ]
+
+
+def main():
+    legacy = load_legacy_module(sys.argv[1] if len(sys.argv) > 1 else LEGACY_REF, miot_spec.__name__)
+    dat = spec_data()
+    old, new = legacy.MiotSpec(HASS, dat), miot_spec.MiotSpec(HASS, dat)
+    assert old.services_mapping(excludes=['service_2']) == new.services_mapping(excludes=['service_2'])
+    assert chunk_services_poll(old) == chunk_services_poll(new)
+
+    props = sum(len(s.properties) for s in new.services.values())
+    header(f'Spec mappings, {len(new.services)} services and {props} properties')
+    report(
+        'services_mapping',
+        measure(lambda: old.services_mapping(excludes=['service_2']), 200),
+        measure(lambda: new.services_mapping(excludes=['service_2']), 200),
+    )
+    report(
+        'chunk_services poll',
+        measure(lambda: chunk_services_poll(old), 200),
+        measure(lambda: chunk_services_poll(new), 200),
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Spec memory: objects allocated for the specs of many device types, and their per-device copies.
+
+The specs are synthetic, shaped like the ones of miot-spec.org. The spec classes before slots
+are loaded from git history, pass another ref as the first argument to compare with it.
+"""
+import copy
+import gc
+import sys
+import tracemalloc
+from types import SimpleNamespace
+
+from custom_components.xiaomi_miot.core import miot_spec
+from .common import header, load_legacy_module, report
+
+# the parent of the commit adding slots to the spec elements
+LEGACY_REF = '18b7f8f~1'
+
+SERVICES = ['switch', 'indicator-light', 'physical-controls-locked', 'environment', 'filter', 'alarm', 'fan', 'timer']
+PROPERTIES = [
+    'on', 'mode', 'fault', 'temperature', 'relative-humidity', 'pm2.5-density', 'filter-life-level',
+    'fan-level', 'brightness', 'countdown-time', 'battery-level', 'status',
+]
+
+
+def spec_data(num):
+    services = []
+    for siid, srv in enumerate(SERVICES, start=2):
+        props = []
+        for piid, prop in enumerate(PROPERTIES, start=1):
+            dat = {
+                'iid': piid,
+                'type': f'urn:miot-spec-v2:property:{prop}:000000{piid:02X}:bench-{num}:1',
+                'description': prop.replace('-', ' ').title(),
+                'format': 'uint8',
+                'access': ['read', 'write', 'notify'],
+            }
+            if prop in ('mode', 'status', 'fault'):
+                dat['value-list'] = [{'value': v, 'description': f'Value {v}'} for v in range(6)]
+            else:
+                dat['value-range'] = [0, 100, 1]
+                dat['unit'] = 'percentage'
+            props.append(dat)
+        actions = [{
+            'iid': 1,
+            'type': f'urn:miot-spec-v2:action:toggle:00002811:bench-{num}:1',
+            'description': 'Toggle',
+            'in': [],
+            'out': [],
+        }]
+        services.append({
+            'iid': siid,
+            'type': f'urn:miot-spec-v2:service:{srv}:000078{siid:02X}:bench-{num}:1',
+            'description': srv.replace('-', ' ').title(),
+            'properties': props,
+            'actions': actions,
+        })
+    return {
+        'type': f'urn:miot-spec-v2:device:air-purifier:0000A007:bench-{num}:1',
+        'description': 'Air Purifier',
+        'services': services,
+    }
+
+
+HASS = SimpleNamespace(config=SimpleNamespace(language='en'), data={})
+
+
+def allocated(module, specs, devices):
+    """MiB allocated for loading the specs and copying them for the devices."""
+    gc.collect()
+    tracemalloc.start()
+    loaded = [module.MiotSpec(HASS, dat) for dat in specs]
+    copies = [copy.copy(loaded[i % len(loaded)]) for i in range(devices)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del loaded, copies
+    return size / 1048576
+
+
+def main():
+    legacy = load_legacy_module(sys.argv[1] if len(sys.argv) > 1 else LEGACY_REF, miot_spec.__name__)
+    props = len(SERVICES) * len(PROPERTIES)
+    # load the shared translation tables outside of the measurements
+    for module in (legacy, miot_spec):
+        allocated(module, [spec_data(0)], 1)
+    for types, devices in ((20, 40), (100, 200)):
+        specs = [spec_data(i) for i in range(types)]
+        header(f'{types} spec types of {len(SERVICES)} services and {props} properties, {devices} devices')
+        report('allocated memory', allocated(legacy, specs, devices), allocated(miot_spec, specs, devices), 'MiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Helpers of the xiaomi_miot micro-benchmarks.
+
+Run a benchmark from the repository root, with the integration's requirements installed:
+
+    python -m bench.xiaomi_miot.bench_miio_framing
+
+Each benchmark compares the previous implementation with the current one. The previous
+implementation is kept in the benchmark, or loaded from git history when it is too large to copy.
+"""
+import importlib.util
+import os
+import subprocess
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def measure(func, number=1000, repeat=5):
+    """Best of `repeat` runs, in microseconds per call."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def report(name, before, after, unit='us'):
+    ratio = before / after if after else float('inf')
+    print(f'{name:<48} {before:>12.2f} {after:>12.2f} {unit:<4} x{ratio:.1f}')
+
+
+def header(title):
+    print(f'\n{title}')
+    print(f'{"":<48} {"before":>12} {"after":>12}')
+
+
+def load_legacy_module(ref, module):
+    """Import `module` as it was at the git `ref`, next to the current one, for a reference run."""
+    path = module.replace('.', '/') + '.py'
+    source = subprocess.run(
+        ['git', 'show', f'{ref}:{path}'],
+        check=True, capture_output=True, text=True, cwd=ROOT,
+    ).stdout
+    package, name = module.rsplit('.', 1)
+    spec = importlib.util.spec_from_loader(f'{package}._legacy_{name}', loader=None)
+    mod = importlib.util.module_from_spec(spec)
+    mod.__package__ = package
+    sys.modules[spec.name] = mod
+    exec(compile(source, f'{ref}:{path}', 'exec'), mod.__dict__)
+    return mod
@@ -34,7 +34,7 @@ import homeassistant.helpers.device_registry as dr
 import homeassistant.helpers.config_validation as cv
 
 from .core.const import *
-from .core.utils import DeviceException, wildcard_models
+from .core.utils import DeviceException, wildcard_models, clear_customizes_cache
 from .core import HassEntry, BasicEntity, XEntity # noqa
 from .core.device import Device, AsyncMiIO
 from .core.miot_spec import (
@@ -179,6 +179,8 @@ CONFIG_SCHEMA = vol.Schema(
 
 async def async_setup(hass, hass_config: dict):
     init_integration_data(hass)
+    await DEVICE_CUSTOMIZES.async_load(hass)
+    await TRANSLATION_LANGUAGES.async_load(hass)
     config = hass_config.get(DOMAIN) or {}
     await async_reload_integration_config(hass, config)
 
@@ -192,6 +194,7 @@ async def async_setup(hass, hass_config: dict):
             for m, specs in models.items():
                 DEVICE_CUSTOMIZES.setdefault(m, {})
                 DEVICE_CUSTOMIZES[m]['extend_miot_specs'] = specs
+        clear_customizes_cache()
 
     await hass.async_add_executor_job(extend_miot_specs)
 
@@ -212,7 +215,7 @@ async def async_setup(hass, hass_config: dict):
             if not await mic.async_login():
                 raise MiCloudException('Login failed')
             hass.data[DOMAIN][CONF_XIAOMI_CLOUD] = mic
-            hass.data[DOMAIN]['devices_by_mac'] = await mic.async_get_devices_by_key('mac') or {}
+            hass.data[DOMAIN]['devices_by_mac'] = (await mic.async_get_directory()).index('mac')
             hass.data[DOMAIN]['accounts'].setdefault(mic.user_id, {CONF_XIAOMI_CLOUD: mic})
             cnt = len(hass.data[DOMAIN]['devices_by_mac'])
             _LOGGER.debug('Setup xiaomi cloud for user: %s, %s devices', config.get(CONF_USERNAME), cnt)
@@ -275,6 +278,7 @@ async def async_setup_xiaomi_cloud(hass: hass_core.HomeAssistant, config_entry:
         _LOGGER.warning('None device in xiaomi cloud: %s', username)
     else:
         _LOGGER.debug('Setup xiaomi cloud for user: %s, %s devices', username, len(devices))
+        await entry.async_prefetch_specs(list(devices.values()))
     for d in devices.values():
         device = await entry.new_device(d)
         if not device.spec:
@@ -318,6 +322,7 @@ async def async_setup_customizes(hass: hass_core.HomeAssistant, config_entry: co
                 continue
             DEVICE_CUSTOMIZES.setdefault(m, {})
             DEVICE_CUSTOMIZES[m].update(cfg)
+    clear_customizes_cache()
     if entry_data:
         _LOGGER.info('Customizing via config flow: %s', entry_data)
 
@@ -330,6 +335,7 @@ async def async_update_options(hass: hass_core.HomeAssistant, config_entry: conf
     entry.pop('ssecurity', None)
     _LOGGER.debug('Xiaomi Miot update options: %s', entry)
     hass.data[DOMAIN]['sub_entities'] = {}
+    clear_customizes_cache()
     await hass.config_entries.async_reload(config_entry.entry_id)
 
 
@@ -430,6 +436,7 @@ async def async_reload_integration_config(hass, config):
                 continue
             DEVICE_CUSTOMIZES.setdefault(m, {})
             DEVICE_CUSTOMIZES[m].update(cus)
+    clear_customizes_cache()
     return config
 
 
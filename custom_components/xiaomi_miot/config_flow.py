@@ -440,6 +440,8 @@ class XiaomiMiotFlowHandler(config_entries.ConfigFlow, BaseFlowHandler, domain=D
             'bool2selects': cv.multi_select({}),
             'interval_seconds': cv.string,
             'chunk_properties': cv.string,
+            'chunk_window': cv.string,
+            'miio_commands_window': cv.string,
             'sensor_properties': cv.string,
             'binary_sensor_properties': cv.string,
             'switch_properties': cv.string,
@@ -567,7 +569,7 @@ class XiaomiMiotFlowHandler(config_entries.ConfigFlow, BaseFlowHandler, domain=D
                     if isinstance(v, MiotCloud):
                         mic = v
                         if mic.user_id not in uds:
-                            uds[mic.user_id] = await mic.async_get_devices_by_key('model') or {}
+                            uds[mic.user_id] = (await mic.async_get_directory()).index('model')
                             models.update(uds[mic.user_id])
                 if models:
                     models = sorted(models.keys())
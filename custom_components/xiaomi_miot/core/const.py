@@ -1,11 +1,64 @@
+import importlib
 from enum import Enum
 from typing import Union
+from collections.abc import MutableMapping
 
 from homeassistant.const import __version__ as HAVERSION  # noqa
 from awesomeversion import AwesomeVersion
-from .device_customizes import DEVICE_CUSTOMIZES, GLOBAL_CONVERTERS  # noqa
 from .miot_local_devices import MIOT_LOCAL_MODELS  # noqa
-from .translation_languages import TRANSLATION_LANGUAGES  # noqa
+
+
+class LazyTable(MutableMapping):
+    """A dict that imports the module defining it on first access."""
+
+    def __init__(self, module: str, name: str):
+        self._module = module
+        self._name = name
+        self._data = None
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            mod = importlib.import_module(self._module, __package__)
+            self._data = getattr(mod, self._name)
+        return self._data
+
+    async def async_load(self, hass):
+        """Import the module in the executor, so the first access does not block the event loop."""
+        if self._data is None:
+            await hass.async_add_executor_job(lambda: self.data)
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def __repr__(self):
+        if self._data is None:
+            return f'<LazyTable {self._module}.{self._name}>'
+        return repr(self._data)
+
+
+DEVICE_CUSTOMIZES = LazyTable('.device_customizes', 'DEVICE_CUSTOMIZES')
+MIIO_TO_MIOT_SPECS = LazyTable('.miio2miot_specs', 'MIIO_TO_MIOT_SPECS')
+TRANSLATION_LANGUAGES = LazyTable('.translation_languages', 'TRANSLATION_LANGUAGES')
 
 DOMAIN = 'xiaomi_miot'
 DEFAULT_NAME = 'Xiaomi Miot'
@@ -1,18 +1,126 @@
+import time
+import asyncio
 import logging
 from typing import TYPE_CHECKING
+from contextlib import asynccontextmanager, nullcontext
+from contextvars import ContextVar
 
-from homeassistant.core import HassJob, HassJobType
+from homeassistant.core import HomeAssistant, HassJob, HassJobType
 from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
+from .const import DOMAIN
+
 if TYPE_CHECKING:
     from .device import Device
 
 _LOGGER = logging.getLogger(__name__)
 
+# fractional part of the golden ratio, consecutive multiples of it are spread evenly over [0, 1)
+GOLDEN_RATIO_FRACTION = 0.6180339887498949
+
+
+class PollSlot:
+    """A taken slot of the scheduler, released once when the poll ends or earlier."""
+
+    def __init__(self, scheduler: 'PollScheduler', kind: str):
+        self.scheduler = scheduler
+        self.kind = kind
+        self.released = False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        self.scheduler.stats[self.kind]['in_flight'] -= 1
+        self.scheduler.semaphores[self.kind].release()
+
+
+# the slot of the poll running in the current task
+current_slot: ContextVar[PollSlot | None] = ContextVar('xiaomi_miot_poll_slot', default=None)
+
+
+class PollScheduler:
+    """Spread the coordinator polls of all devices and limit the requests in flight."""
+    limits = {
+        'local': 8,
+        'cloud': 4,
+    }
+    # the first polls are spread over the interval, but not longer than this
+    max_spread = 60
+
+    def __init__(self):
+        self.semaphores = {
+            k: asyncio.Semaphore(v)
+            for k, v in self.limits.items()
+        }
+        self.stats = {
+            k: {'in_flight': 0, 'queued': 0, 'max_queued': 0, 'polls': 0, 'lateness': 0.0, 'max_lateness': 0.0}
+            for k in self.limits
+        }
+        self.phases: dict[str, int] = {}
+
+    @staticmethod
+    def from_hass(hass: HomeAssistant) -> 'PollScheduler':
+        if not (obj := hass.data[DOMAIN].get('poll_scheduler')):
+            obj = hass.data[DOMAIN]['poll_scheduler'] = PollScheduler()
+        return obj
+
+    def offset(self, name: str, interval: float):
+        """Delay of the first poll, spread evenly by the order the names are seen, a name keeps its phase."""
+        spread = min(interval or 0, self.max_spread)
+        index = self.phases.setdefault(name, len(self.phases))
+        return (index * GOLDEN_RATIO_FRACTION) % 1 * spread
+
+    @staticmethod
+    def release_current(kind: str = None):
+        """Give back the slot of the running poll early, e.g. before it falls back from local to cloud."""
+        if (slot := current_slot.get()) and (kind is None or slot.kind == kind):
+            slot.release()
+
+    @asynccontextmanager
+    async def slot(self, kind: str, due=None):
+        if kind not in self.semaphores:
+            kind = 'cloud'
+        stats = self.stats[kind]
+        stats['queued'] += 1
+        stats['max_queued'] = max(stats['max_queued'], stats['queued'])
+        try:
+            await self.semaphores[kind].acquire()
+        finally:
+            stats['queued'] -= 1
+        stats['in_flight'] += 1
+        stats['polls'] += 1
+        if due:
+            late = max(0.0, time.monotonic() - due)
+            # moving average
+            stats['lateness'] += (late - stats['lateness']) * 0.1
+            stats['max_lateness'] = max(stats['max_lateness'], late)
+        handle = PollSlot(self, kind)
+        token = current_slot.set(handle)
+        try:
+            yield handle
+        finally:
+            current_slot.reset(token)
+            handle.release()
+
+    def metrics(self):
+        return {
+            k: {
+                **v,
+                'limit': self.limits[k],
+                'lateness': round(v['lateness'], 3),
+                'max_lateness': round(v['max_lateness'], 3),
+            }
+            for k, v in self.stats.items()
+        }
+
+
 class DataCoordinator(DataUpdateCoordinator):
     def __init__(self, device: 'Device', update_method, **kwargs):
         kwargs.setdefault('always_update', True)
+        self.poll_kind = kwargs.pop('kind', None)
+        self.poll_due = None
 
         if callable(update_method):
             name = update_method.__name__
@@ -31,6 +139,7 @@ class DataCoordinator(DataUpdateCoordinator):
             **kwargs,
         )
         self.device = device
+        self.scheduler = PollScheduler.from_hass(device.hass)
         if not hasattr(self, 'setup_method'):
             # hass v2024.7-
             self.async_add_listener(self.coordinator_updated)
@@ -38,13 +147,27 @@ class DataCoordinator(DataUpdateCoordinator):
     async def async_setup(self, index=0):
         await self._async_setup()
 
+        interval = self.update_interval.total_seconds() if self.update_interval else 0
+        delay = index + self.scheduler.offset(self.name, interval)
+        self.poll_due = time.monotonic() + delay
         job = HassJob(self._async_refresh_later, job_type=HassJobType.Coroutinefunction)
-        async_call_later(self.hass, index, job)
+        async_call_later(self.hass, delay, job)
 
     async def _async_setup(self):
         """Set up coordinator."""
         self.async_add_listener(self.coordinator_updated)
 
+    async def _async_update_data(self):
+        kind = self.poll_kind or ('local' if self.device.use_local else None)
+        # miot properties from cloud are batched across devices, the batch request takes the slot
+        slot = self.scheduler.slot(kind, self.poll_due) if kind else nullcontext()
+        try:
+            async with slot:
+                return await super()._async_update_data()
+        finally:
+            if self.update_interval:
+                self.poll_due = time.monotonic() + self.update_interval.total_seconds()
+
     def coordinator_updated(self):
         _LOGGER.debug('%s: Coordinator updated: %s', self.device.name_model, [self.name, self.data])
 
@@ -1,6 +1,8 @@
 import logging
+import asyncio
 import copy
 import re
+import time
 from typing import TYPE_CHECKING, Optional, Callable
 from datetime import timedelta
 from functools import cached_property
@@ -14,7 +16,7 @@ import homeassistant.helpers.device_registry as dr
 from .const import (
     DOMAIN,
     DEVICE_CUSTOMIZES,
-    GLOBAL_CONVERTERS,
+    MIIO_TO_MIOT_SPECS,
     MIOT_LOCAL_MODELS,
     DEFAULT_NAME,
     CONF_CONN_MODE,
@@ -27,13 +29,14 @@ from .converters import (
     MiotPropValueConv, MiotActionConv,
     AttrConv, MiotTargetPositionConv,
 )
-from .coordinator import DataCoordinator
+from .coordinator import DataCoordinator, PollScheduler
 from .miot_spec import MiotSpec, MiotProperty, MiotResults, MiotResult
 from .miio2miot import Miio2MiotHelper
-from .mini_miio import AsyncMiIO
+from .mini_miio import AsyncMiIO, chunk_failed
 from .xiaomi_cloud import MiotCloud, MiCloudException
 from .utils import (
     CustomConfigHelper,
+    SharedStore,
     get_customize_via_model,
     get_value,
     DeviceException,
@@ -45,6 +48,8 @@ from .templates import template
 if TYPE_CHECKING:
     from . import BasicEntity
 
+_LOGGER = logging.getLogger(__name__)
+
 InfoConverter = InfoConv().with_option(
     icon='mdi:information',
     device_class='update',
@@ -154,6 +159,8 @@ class Device(CustomConfigHelper):
     available = True
     miot_entity = None
     miot_results = None
+    poller: Optional['AdaptivePoller'] = None
+    poller_coordinator: Optional[DataCoordinator] = None
     _local_fails = 0
     _local_state = None
     _cloud_fails = 0
@@ -164,6 +171,7 @@ class Device(CustomConfigHelper):
     _exclude_miot_properties = None
     _unreadable_properties = None
     _unsub_purge = None
+    miot_status_fresh = 2
 
     def __init__(self, info: DeviceInfo, entry: HassEntry):
         self.data = {}
@@ -174,16 +182,29 @@ class Device(CustomConfigHelper):
         self.props: dict = {}
         self.entities: dict[str, 'BasicEntity'] = {}
         self.listeners: list[Callable] = []
+        self._attr_listeners: dict[str, list[Callable]] = {}
+        self._dispatched: dict = {}
+        self._dispatched_available = None
         self.converters: list[BaseConv] = []
+        self._convs_by_mi: dict[str, list[BaseConv]] = {}
+        self._convs_by_name: dict[str, list[BaseConv]] = {}
+        self._convs_by_attr: dict[str, list[tuple[int, BaseConv]]] = {}
+        self._results_tables: dict[int, tuple[dict, int, dict]] = {}
         self.coordinators: list[DataCoordinator] = []
         self.main_coordinators: list[DataCoordinator] = []
+        self._miot_status_tasks: dict[tuple, tuple[int, asyncio.Task]] = {}
+        self._miot_status_fresh: dict[tuple, tuple[float, MiotResults]] = {}
+        self._miot_status_gen = 0
         self.log = logging.getLogger(f'{__name__}.{self.model}')
 
     async def async_init(self):
         if not self.cloud_only:
             self.local = MiotDevice.from_device(self)
+        if self.local and not self.custom_config_integer('chunk_properties'):
+            self.local.chunk_sizer = await ChunkSizer.async_from_device(self)
         spec = await self.get_spec()
         if spec and self.local and not self.cloud_only:
+            await MIIO_TO_MIOT_SPECS.async_load(self.hass)
             self.miio2miot = Miio2MiotHelper.from_model(self.hass, self.model, spec)
             mps = self.custom_config_list('miio_properties')
             if mps and self.miio2miot:
@@ -211,6 +232,8 @@ class Device(CustomConfigHelper):
         for coo in self.coordinators:
             await coo.async_shutdown()
 
+        if self.spec:
+            MiotSpec.clear_type_cache(self.hass, self.spec.type)
         self.spec = None
         self.hass.data[DOMAIN].setdefault('miot_specs', {}).pop(self.model, None)
 
@@ -319,6 +342,10 @@ class Device(CustomConfigHelper):
             return ext
         return None
 
+    @property
+    def trans_options(self):
+        return self.custom_config_bool('trans_options', self.entry.get_config('trans_options'))
+
     async def get_spec(self) -> Optional[MiotSpec]:
         if self.spec:
             return self.spec
@@ -326,15 +353,20 @@ class Device(CustomConfigHelper):
         dat = self.hass.data[DOMAIN].setdefault('miot_specs', {})
         obj = dat.get(self.model)
         if not obj:
-            trans_options = self.custom_config_bool('trans_options', self.entry.get_config('trans_options'))
             urn = await self.get_urn()
-            obj = await MiotSpec.async_from_type(self.hass, urn, trans_options=trans_options)
+            obj = await MiotSpec.async_from_type(self.hass, urn, trans_options=self.trans_options)
             dat[self.model] = obj
         if obj:
             self.spec = copy.copy(obj)
             if not self.cloud_only:
                 if ext := self.extend_miot_specs:
                     self.spec.extend_specs(services=ext)
+            if isinstance(dic := self.custom_config_json('miot_mapping'), dict):
+                # renamed by set_custom_mapping after the converters are created
+                for v in dic.values():
+                    prop = self.spec.specs.get(MiotSpec.unique_prop(v, valid=True))
+                    if isinstance(prop, MiotProperty):
+                        self.spec.own_property(prop)
             self.init_converters()
         return self.spec
 
@@ -364,7 +396,13 @@ class Device(CustomConfigHelper):
         if not force and self.find_converter(conv.full_name):
             self.log.info('Converter for %s already exists. Ignored.', conv.full_name)
             return
+        pos = len(self.converters)
         self.converters.append(conv)
+        if conv.mi:
+            self._convs_by_mi.setdefault(conv.mi, []).append(conv)
+        self._convs_by_name.setdefault(conv.full_name, []).append(conv)
+        self._convs_by_attr.setdefault(f'{conv.attr}'.split(':')[0], []).append((pos, conv))
+        self._results_tables.clear()
 
     def add_converter_by_property(self, prop: MiotProperty, domain=None, option=None, cls=None, **kwargs):
         if not cls:
@@ -376,9 +414,8 @@ class Device(CustomConfigHelper):
         return conv
 
     def find_converter(self, full_name):
-        for c in self.converters:
-            if c.full_name == full_name:
-                return c
+        if convs := self._convs_by_name.get(full_name):
+            return convs[0]
         return None
 
     def init_converters(self):
@@ -389,6 +426,7 @@ class Device(CustomConfigHelper):
             return
 
         appends = self.custom_config_list('append_converters') or []
+        from .device_customizes import GLOBAL_CONVERTERS
         for cfg in [*GLOBAL_CONVERTERS, *appends]:
             cls = cfg.get('class')
             kwargs = cfg.get('kwargs', {})
@@ -499,24 +537,24 @@ class Device(CustomConfigHelper):
         lst = await self.init_miot_coordinators(interval)
         if self.cloud_statistics_commands:
             lst.append(
-                DataCoordinator(self, self.update_cloud_statistics, update_interval=timedelta(seconds=interval*10)),
+                DataCoordinator(self, self.update_cloud_statistics, kind='cloud', update_interval=timedelta(seconds=interval*10)),
             )
         if self.miio_cloud_records:
             seconds = self.custom_config_integer('miio_cloud_records_interval') or interval*10
             lst.append(
-                DataCoordinator(self, self.update_miio_cloud_records, update_interval=timedelta(seconds=seconds)),
+                DataCoordinator(self, self.update_miio_cloud_records, kind='cloud', update_interval=timedelta(seconds=seconds)),
             )
         if self.miio_cloud_props:
             lst.append(
-                DataCoordinator(self, self.update_miio_cloud_props, update_interval=timedelta(seconds=interval*2)),
+                DataCoordinator(self, self.update_miio_cloud_props, kind='cloud', update_interval=timedelta(seconds=interval*2)),
             )
         if self.custom_miio_properties:
             lst.append(
-                DataCoordinator(self, self.update_miio_props, update_interval=timedelta(seconds=interval)),
+                DataCoordinator(self, self.update_miio_props, kind='local', update_interval=timedelta(seconds=interval)),
             )
         if self.custom_miio_commands:
             lst.append(
-                DataCoordinator(self, self.update_miio_commands, update_interval=timedelta(seconds=interval)),
+                DataCoordinator(self, self.update_miio_commands, kind='local', update_interval=timedelta(seconds=interval)),
             )
         self.coordinators.extend(lst)
 
@@ -535,9 +573,16 @@ class Device(CustomConfigHelper):
         if self.miio2miot:
             chunks = []
 
-        def update_factory(mapping, notify=False, chunk_services=None):
+        def update_factory(mapping, notify=False, chunk_services=None, poller=None):
             async def _update():
-                result = await self.update_miot_status(mapping, chunk_services=chunk_services)
+                mapp = mapping
+                if poller:
+                    mapp = poller.due_mapping(mapping)
+                    if not mapp:
+                        return self.miot_results
+                result = await self.update_miot_status(mapp, chunk_services=chunk_services)
+                if poller:
+                    poller.observe(mapp, self.props, result)
                 if notify:
                     for entity in self.entities.values():
                         if isinstance(entity, XEntity):
@@ -580,12 +625,23 @@ class Device(CustomConfigHelper):
 
         if all_mapping:
             chunk_services = self.custom_config_integer('chunk_services')
+            inter = interval
+            if self.custom_config_bool('adaptive_polling') and not chunk_services and not self.miio2miot:
+                self.poller = AdaptivePoller(
+                    all_mapping,
+                    interval,
+                    floor=self.custom_config_integer('adaptive_polling_floor'),
+                    ceiling=self.custom_config_integer('adaptive_polling_ceiling'),
+                )
+                inter = self.poller.floor
             coo = DataCoordinator(
-                self, update_factory(all_mapping, True, chunk_services=chunk_services),
+                self, update_factory(all_mapping, True, chunk_services=chunk_services, poller=self.poller),
                 name='miot_status',
-                update_interval=timedelta(seconds=interval),
+                update_interval=timedelta(seconds=inter),
             )
             lst.append(coo)
+            if self.poller:
+                self.poller_coordinator = coo
             if not self.main_coordinators:
                 self.main_coordinators.append(coo)
         self.log.debug('Miot coordinators: %s', [*chunks, all_mapping])
@@ -638,24 +694,62 @@ class Device(CustomConfigHelper):
         self.entities[unique] = entity
         return entity
 
-    def add_listener(self, handler: Callable):
-        if handler not in self.listeners:
-            self.listeners.append(handler)
+    def add_listener(self, handler: Callable, attrs=None):
+        """Listen to every update, or only to updates containing one of `attrs`."""
+        if attrs is None:
+            if handler not in self.listeners:
+                self.listeners.append(handler)
+            return
+        for attr in attrs:
+            lst = self._attr_listeners.setdefault(attr, [])
+            if handler not in lst:
+                lst.append(handler)
+        self.reset_dispatched()
 
     def remove_listener(self, handler: Callable):
         if handler in self.listeners:
             self.listeners.remove(handler)
+        for attr, lst in list(self._attr_listeners.items()):
+            if handler in lst:
+                lst.remove(handler)
+            if not lst:
+                self._attr_listeners.pop(attr, None)
 
-    def dispatch(self, data: dict, only_info=False, log=True):
+    def dispatch(self, data: dict, only_info=False, log=True, keys=None):
         if log:
             self.log.info('Device updated: %s', {**data, 'only_info': only_info})
-        for handler in self.listeners:
+        if not only_info:
+            self._dispatched.update(data)
+        handlers = {}
+        for k in (data.keys() if keys is None else keys):
+            for handler in self._attr_listeners.get(k, ()):
+                handlers[handler] = None
+        for handler in [*self.listeners, *handlers]:
             handler(data, only_info=only_info)
 
+    def dispatch_changes(self, data: dict):
+        """Only wake listeners of values that changed since the last poll."""
+        if self._dispatched_available != self.available:
+            self._dispatched_available = self.available
+            self.reset_dispatched()
+        keys = [
+            k
+            for k, v in data.items()
+            if k not in self._dispatched or self._dispatched[k] != v
+        ]
+        if not keys:
+            self.log.debug('Device not changed: %s', list(data))
+            return
+        self.dispatch(data, keys=keys)
+
+    def reset_dispatched(self):
+        """Next poll will wake all listeners of its values."""
+        self._dispatched.clear()
+
     def dispatch_info(self):
         info = {}
         InfoConverter.decode(self, info, None)
-        self.dispatch(info, only_info=True, log=False)
+        self.dispatch(info, only_info=True, log=False, keys=[InfoConverter.full_name])
 
     def decode(self, data: dict | list) -> dict:
         """Decode data from device."""
@@ -676,16 +770,76 @@ class Device(CustomConfigHelper):
         piid = value.get('piid')
         if siid and piid:
             mi = MiotSpec.unique_prop(siid, piid=piid)
-            for conv in self.converters:
-                if conv.mi == mi:
-                    conv.decode(self, payload, value.get('value'))
+            for conv in self._convs_by_mi.get(mi, ()):
+                conv.decode(self, payload, value.get('value'))
+
+    def results_table(self, mapping: dict) -> dict:
+        """(siid, piid) -> (attr, error attr, converters) for decoding the results of the mapping."""
+        cached = self._results_tables.get(id(mapping))
+        if cached and cached[0] is mapping and cached[1] == len(mapping):
+            return cached[2]
+        table = {}
+        for mi, convs in self._convs_by_mi.items():
+            if not f'{mi}'.startswith('prop.'):
+                continue
+            _, s, p = mi.split('.')
+            table[(int(s), int(p))] = (None, None, tuple(convs))
+        for k, v in (mapping or {}).items():
+            try:
+                key = (int(v['siid']), int(v['piid']))
+            except (TypeError, ValueError, KeyError):
+                continue
+            convs = table.get(key, (None, None, ()))[2]
+            table[key] = (k, f'{k}.error', convs)
+        if len(self._results_tables) >= 8:
+            self._results_tables.clear()
+        self._results_tables[id(mapping)] = (mapping, len(mapping or {}), table)
+        return table
+
+    def decode_results(self, results: list, mapping: dict, attrs: dict = None) -> dict:
+        """Decode the results of get_properties to mapped attrs and converter payload in one pass."""
+        table = self.results_table(mapping)
+        payload = {}
+        for value in results or []:
+            if not isinstance(value, dict):
+                self.log.warning('Value is not dict: %s', value)
+                continue
+            siid = value.get('siid')
+            piid = value.get('piid')
+            if (row := table.get((siid, piid))) is None:
+                try:
+                    row = table.get((int(siid), int(piid)))
+                except (TypeError, ValueError):
+                    row = None
+                if row is None:
+                    continue
+            attr, err, convs = row
+            code = value.get('code')
+            if attr is not None and attrs is not None:
+                if code == 0:
+                    attrs[attr] = value.get('value')
+                    if err in attrs:
+                        del attrs[err]
+                else:
+                    attrs[err] = MiotSpec.spec_error(code)
+            if convs and not code:
+                val = value.get('value')
+                for conv in convs:
+                    conv.decode(self, payload, val)
+        return payload
 
     def decode_attrs(self, value: dict):
         if not isinstance(value, dict):
             self.log.warning('Value is not dict: %s', value)
             return
         payload = {}
-        for conv in self.converters:
+        convs = [
+            c
+            for k in value.keys()
+            for c in self._convs_by_attr.get(k, ())
+        ]
+        convs.sort(key=lambda c: c[0])
+        for _, conv in convs:
             val = get_value(value, conv.attr, None, ':')
             if val is not None:
                 conv.decode(self, payload, val)
@@ -695,9 +849,8 @@ class Device(CustomConfigHelper):
         """Encode data from hass to device."""
         payload = {}
         for k, v in value.items():
-            for conv in self.converters:
-                if conv.full_name == k:
-                    conv.encode(self, payload, v)
+            for conv in self._convs_by_name.get(k, ()):
+                conv.encode(self, payload, v)
         return payload
 
     async def async_write(self, payload: dict):
@@ -813,9 +966,9 @@ class Device(CustomConfigHelper):
         max_properties=None,
         chunk_services=None,
     ) -> MiotResults:
-        results = []
-        self.miot_results = MiotResults()
-
+        """Concurrent calls for the same mapping share one request, and a call
+        within `miot_status_fresh` seconds of a successful one reuses its results.
+        """
         if use_local is None:
             use_local = False if use_cloud else self.use_local
         if use_cloud is None:
@@ -824,9 +977,50 @@ class Device(CustomConfigHelper):
             auto_cloud = self.auto_cloud
         if check_lan is None:
             check_lan = self.custom_config_bool('check_lan')
-
         if mapping is None:
             mapping = self.miot_mapping()
+
+        key = (frozenset(mapping or ()), use_local, use_cloud, auto_cloud, check_lan, max_properties, chunk_services)
+        gen = self._miot_status_gen
+        if (running := self._miot_status_tasks.get(key)) and running[0] == gen:
+            # reads started before a write are not joined
+            return await asyncio.shield(running[1])
+        if fresh := self._miot_status_fresh.get(key):
+            if time.monotonic() - fresh[0] < self.miot_status_fresh:
+                self.log.debug('Update miot status from recent results: %s', list(mapping or ()))
+                return fresh[1]
+            self._miot_status_fresh.pop(key, None)
+
+        task = self.hass.async_create_task(self._update_miot_status(
+            mapping, use_local, use_cloud, auto_cloud, check_lan, max_properties, chunk_services,
+        ))
+        self._miot_status_tasks[key] = (gen, task)
+
+        def done(tsk: asyncio.Task):
+            if (running := self._miot_status_tasks.get(key)) and running[1] is tsk:
+                self._miot_status_tasks.pop(key, None)
+            if tsk.cancelled() or tsk.exception():
+                return
+            if gen != self._miot_status_gen:
+                # a write happened meanwhile, the results may be stale
+                return
+            res = tsk.result()
+            if res.is_valid and not res.errors and not res.has_error:
+                self._miot_status_fresh[key] = (time.monotonic(), res)
+        task.add_done_callback(done)
+        return await asyncio.shield(task)
+
+    def invalidate_miot_status(self):
+        """Drop the recent results, and stop sharing the reads in flight."""
+        self._miot_status_gen += 1
+        self._miot_status_fresh.clear()
+
+    async def _update_miot_status(
+        self, mapping, use_local, use_cloud, auto_cloud, check_lan, max_properties, chunk_services,
+    ) -> MiotResults:
+        results = []
+        self.miot_results = MiotResults()
+
         if not mapping:
             use_local = False
             use_cloud = False
@@ -847,7 +1041,7 @@ class Device(CustomConfigHelper):
                 else:
                     if not max_properties:
                         max_properties = self.custom_config_integer('chunk_properties')
-                    if not max_properties:
+                    if not max_properties and not self.local.chunk_sizer:
                         max_properties = self.local.get_max_properties(mapping)
                     maps = []
                     if chunk_services:
@@ -892,6 +1086,8 @@ class Device(CustomConfigHelper):
                 )
 
         if use_cloud:
+            # the local poll is over, the cloud request takes a cloud slot
+            PollScheduler.release_current('local')
             try:
                 self.miot_results.updater = 'cloud'
                 results = await self.cloud.async_get_properties_for_mapping(self.did, mapping)
@@ -927,9 +1123,9 @@ class Device(CustomConfigHelper):
                 dev_reg.async_update_device(dev.id, sw_version=self.sw_version)
                 self.log.info('State updater: %s', self.sw_version)
         if results:
-            self.miot_results.to_attributes(self.props)
+            payload = self.decode_results(results, mapping, self.props)
             self.data['updated'] = dt.now()
-            self.dispatch(self.decode(results))
+            self.dispatch_changes(payload)
         self.dispatch_info()
         await self.offline_notify()
         return self.miot_results
@@ -1021,12 +1217,16 @@ class Device(CustomConfigHelper):
                 raise exc
             return {'error': str(exc)}
         self.log.info('Get miot properties: %s', results)
+        attrs = {}
+        payload = self.decode_results(results, mapping, attrs)
         if results and update_entity:
-            self.dispatch(self.decode(results))
-        result = MiotResults(results, mapping)
-        return result.to_attributes()
+            self.dispatch(payload)
+        return attrs
 
     async def async_set_properties(self, params):
+        self.invalidate_miot_status()
+        if self.poller:
+            self.poller.boost(params)
         results = []
         cloud_params = []
         cloud_write = self.cloud and self.custom_config_bool('miot_cloud_write')
@@ -1052,6 +1252,11 @@ class Device(CustomConfigHelper):
             else:
                 results.extend(await self.cloud.async_set_props(cloud_params) or [])
         self.log.debug('Set properties: %s', [params, cloud_params, results])
+        # reads started while writing may still return the old values
+        self.invalidate_miot_status()
+        if self.poller_coordinator and any(isinstance(r, dict) and r.get('code') in (0, 1) for r in results):
+            # boost only makes the written properties due, poll them now instead of on the next tick
+            await self.poller_coordinator.async_request_refresh()
         return results
 
     async def async_set_property(self, field, value):
@@ -1100,6 +1305,7 @@ class Device(CustomConfigHelper):
         return result
 
     async def async_call_action(self, siid, aiid, params=None, **kwargs):
+        self.invalidate_miot_status()
         did = self.did or MiotSpec.unique_prop(siid, aiid=aiid)
         pms = {
             'did':  str(did),
@@ -1135,6 +1341,7 @@ class Device(CustomConfigHelper):
         except (TypeError, ValueError) as exc:
             self.log.warning('Call miot action %s failed: %s, result: %s', pms, exc)
             return MiotResult({}, code=-1, error=str(exc))
+        self.invalidate_miot_status()
         if result.is_success:
             self.log.debug('Call miot action %s, result: %s', pms, result)
         else:
@@ -1163,10 +1370,11 @@ class Device(CustomConfigHelper):
             commands = self.cloud_statistics_commands
 
         now = int(dt.now().timestamp())
-        attrs = {}
-        for c in commands:
-            if not c.get('key'):
-                continue
+        commands = [c for c in commands if c.get('key')]
+        if not commands:
+            return
+
+        async def _fetch(c):
             pms = {
                 'did': self.did,
                 'key': c.get('key'),
@@ -1175,7 +1383,17 @@ class Device(CustomConfigHelper):
                 'time_end': now + 60,
                 'limit': int(c.get('limit') or 1),
             }
-            rdt = await self.cloud.async_request_api('v2/user/statistics', pms) or {}
+            return await self.cloud.async_get_statistics(pms)
+
+        results = await asyncio.gather(*map(_fetch, commands), return_exceptions=True)
+        if all(isinstance(r, Exception) for r in results):
+            raise results[0]
+        attrs = {}
+        for c, rdt in zip(commands, results):
+            if isinstance(rdt, Exception):
+                self.log.warning('Got micloud statistics for %s failed: %s', c.get('key'), rdt)
+                continue
+            rdt = rdt or {}
             self.log.info('Got micloud statistics: %s', rdt)
             if tpl := c.get('template'):
                 tpl = template(tpl, self.hass)
@@ -1209,7 +1427,7 @@ class Device(CustomConfigHelper):
         if not keys:
             return
 
-        attrs = {}
+        reqs = []
         for c in keys:
             mat = re.match(r'^\s*(?:(\w+)\.?)([\w.]+)(?::(\d+))?(?::(\w+))?\s*$', c)
             if not mat:
@@ -1221,7 +1439,21 @@ class Device(CustomConfigHelper):
             }
             if gby:
                 kws['group'] = gby
-            rdt = await self.cloud.async_get_user_device_data(self.did, key, typ, **kws) or []
+            reqs.append((typ, key, kws))
+
+        async def _fetch(typ, key, kws):
+            async with self.cloud.history_semaphore():
+                return await self.cloud.async_get_user_device_data(self.did, key, typ, **kws)
+
+        results = await asyncio.gather(*[_fetch(*r) for r in reqs], return_exceptions=True)
+        if results and all(isinstance(r, Exception) for r in results):
+            raise results[0]
+        attrs = {}
+        for (typ, key, _), rdt in zip(reqs, results):
+            if isinstance(rdt, Exception):
+                self.log.warning('Got miio cloud records for %s.%s failed: %s', typ, key, rdt)
+                continue
+            rdt = rdt or []
             tpl = self.custom_config(f'miio_{typ}_{key}_template')
             if tpl:
                 tpl = template(tpl, self.hass)
@@ -1346,6 +1578,10 @@ class Device(CustomConfigHelper):
 class MiotDevice():
     hass: HomeAssistant = None
     miio: AsyncMiIO = None
+    chunk_window = 1
+    # miio commands of miio2miot sent at once
+    miio_commands_window = 2
+    chunk_sizer: Optional['ChunkSizer'] = None
 
     def __init__(self, hass: HomeAssistant, miio: AsyncMiIO, logger=None):
         self.hass = hass
@@ -1367,7 +1603,12 @@ class MiotDevice():
         elif device.info.pid in [6, 15, 16, 17]:
             return None
         miio = AsyncMiIO(host, token)
-        return MiotDevice(device.hass, miio, device.log)
+        local = MiotDevice(device.hass, miio, device.log)
+        if window := device.custom_config_integer('chunk_window'):
+            local.chunk_window = window
+        if window := device.custom_config_integer('miio_commands_window'):
+            local.miio_commands_window = window
+        return local
 
     async def async_info(self):
         resp = await self.miio.send('miIO.info', tries=2)
@@ -1385,18 +1626,32 @@ class MiotDevice():
         except KeyError:
             return resp
 
-    async def async_send_chunk(self, method: str, params: list, chunk: int = 0):
+    async def async_send_chunk(self, method: str, params: list, chunk: int = 0, window: int = None, on_chunks=None):
         if not chunk:
             chunk = 15
+        if not window:
+            window = self.chunk_window
+        chunks = [params[i : i + chunk] for i in range(0, len(params), chunk)]
+        sem = asyncio.Semaphore(max(window, 1))
+
+        async def _send(pms):
+            async with sem:
+                return await self.miio.send(method, pms)
+
+        resps = await asyncio.gather(*[_send(pms) for pms in chunks])
         results = []
-        for i in range(0, len(params), chunk):
-            resp = await self.miio.send(method, params[i : i + chunk])
-            if not results:
-                self.handle_response(resp)
+        failed = 0
+        if on_chunks:
+            on_chunks([(len(pms), resp) for pms, resp in zip(chunks, resps)])
+        for pms, resp in zip(chunks, resps):
             try:
                 results += resp['result']
             except (KeyError, TypeError):
-                self.log.warning('Got miio chunked properties failed: %s', resp, exc_info=True)
+                failed += 1
+                self.log.warning('Got miio chunked properties failed: %s', resp)
+                results += chunk_failed(pms, resp)
+        if chunks and failed == len(chunks):
+            self.handle_response(resps[0])
         return results
 
     def handle_response(self, resp, with_empty=True):
@@ -1408,8 +1663,8 @@ class MiotDevice():
     async def async_get_prop(self, properties, *, max_properties=None, property_getter='get_prop'):
         return await self.async_get_properties(properties, max_properties=max_properties, property_getter=property_getter)
 
-    async def async_get_properties(self, properties, *, max_properties=None, property_getter='get_properties'):
-        return await self.async_send_chunk(property_getter, properties, max_properties)
+    async def async_get_properties(self, properties, *, max_properties=None, property_getter='get_properties', on_chunks=None):
+        return await self.async_send_chunk(property_getter, properties, max_properties, on_chunks=on_chunks)
 
     async def async_get_properties_for_mapping(self, *, max_properties=None, did=None, mapping=None):
         if mapping is None:
@@ -1418,9 +1673,14 @@ class MiotDevice():
             {'did': f'prop.{v["siid"]}.{v["piid"]}' if did is None else str(did), **v}
             for k, v in mapping.items()
         ]
-        return await self.async_get_properties(properties, max_properties=max_properties)
+        on_chunks = None
+        if not max_properties and (sizer := self.chunk_sizer):
+            max_properties = sizer.size_for(mapping)
+            on_chunks = sizer.observe
+        return await self.async_get_properties(properties, max_properties=max_properties, on_chunks=on_chunks)
 
-    def get_max_properties(self, mapping):
+    @staticmethod
+    def get_max_properties(mapping):
         idx = len(mapping)
         if idx < 10:
             return idx
@@ -1438,6 +1698,188 @@ class MiotDevice():
         return 10 if idx >= len(chunks) else chunks[idx]
 
 
+class ChunkSizer:
+    """Learns the largest get_properties chunk a device answers completely.
+
+    The chunk shrinks when a chunk gets an empty answer while other chunks of the
+    same poll are answered, or when no chunk is answered for a few polls in a row.
+    It grows again after a series of complete answers. The learned size is
+    persisted, so polling starts from it after a restart.
+    """
+    max_size = 15
+    grow_after = 10
+    forget_after = 100
+    # polls in a row without any answer before the size is blamed
+    fail_after = 3
+
+    def __init__(self, store: 'ChunkSizeStore', key: str):
+        self.store = store
+        self.key = key
+        self.size = store.get(key)
+        self.limit = None
+        self.successes = 0
+        self.failures = 0
+
+    @staticmethod
+    async def async_from_device(device: Device):
+        store = await ChunkSizeStore.async_get(device.hass)
+        return ChunkSizer(store, device.unique_id)
+
+    def size_for(self, mapping):
+        if not self.size:
+            return MiotDevice.get_max_properties(mapping)
+        return max(1, min(self.size, len(mapping)))
+
+    def observe(self, replies: list):
+        """Learn from the (size, resp) replies of all chunks of one poll."""
+        full = []
+        answered = False
+        for size, resp in replies:
+            if resp is None or 'error' in resp:
+                # device offline or answered with an error, nothing to learn
+                continue
+            if not self.size:
+                self.size = size
+            result = resp.get('result')
+            complete = bool(result and isinstance(result, list))
+            answered = answered or complete
+            if size >= self.size:
+                # the last chunk says little about the limit
+                full.append((size, complete))
+        if full and not answered:
+            # timeout or empty answer to every chunk, the device may just be busy
+            self.failures += 1
+            if self.failures >= self.fail_after:
+                self.on_failure(full[0][0])
+            return
+        for size, complete in full:
+            if complete:
+                self.on_success()
+            else:
+                # other chunks of this poll were answered, so the size is to blame
+                self.on_failure(size)
+
+    def on_success(self):
+        self.failures = 0
+        self.successes += 1
+        if self.limit and self.successes >= self.forget_after:
+            # conditions may have changed since the last failure
+            self.limit = None
+        if self.successes % self.grow_after:
+            return
+        grown = self.size + 1
+        if grown > self.max_size or (self.limit and grown >= self.limit):
+            return
+        self.set_size(grown)
+
+    def on_failure(self, size: int):
+        self.successes = 0
+        self.failures = 0
+        if size <= 1:
+            return
+        self.limit = min(self.limit or size, size)
+        shrunk = max(1, size * 2 // 3)
+        if shrunk != self.size:
+            self.set_size(shrunk)
+
+    def set_size(self, size: int):
+        _LOGGER.debug('%s: Chunk size for get_properties: %s -> %s', self.key, self.size, size)
+        self.size = size
+        self.store.set(self.key, size)
+
+
+class AdaptivePoller:
+    """Polls each property of a mapping about as often as its value changes.
+
+    The interval of a property halves when its value changed since the last poll,
+    and doubles when it did not, within floor and ceiling. Written properties go
+    back to the floor, so the device's answer to the write shows up quickly.
+    The floor defaults to the scan interval, so polls are never more frequent
+    than without adaptive polling unless a lower floor is configured.
+    """
+    max_mappings = 16
+
+    def __init__(self, mapping: dict, interval: int, floor=None, ceiling=None):
+        self.floor = max(1, floor or interval)
+        self.ceiling = max(self.floor, ceiling or interval * 10)
+        self.initial = min(max(interval, self.floor), self.ceiling)
+        self.names = {}
+        for k, v in mapping.items():
+            try:
+                self.names[(int(v['siid']), int(v['piid']))] = k
+            except (TypeError, ValueError, KeyError):
+                continue
+        self.intervals: dict[str, float] = {}
+        self.due: dict[str, float] = {}
+        self.values: dict = {}
+        self.mappings: dict[frozenset, dict] = {}
+        self.polled = 0
+        self.skipped = 0
+
+    def due_mapping(self, mapping: dict, now=None) -> dict:
+        """Due part of the mapping, the same due set always gets the same dict."""
+        if now is None:
+            now = time.monotonic()
+        keys = frozenset(
+            k
+            for k in mapping
+            if self.due.get(k, 0) <= now
+        )
+        self.polled += len(keys)
+        self.skipped += len(mapping) - len(keys)
+        if len(keys) == len(mapping):
+            return mapping
+        if not keys:
+            return {}
+        if (dat := self.mappings.get(keys)) is None:
+            if len(self.mappings) >= self.max_mappings:
+                self.mappings.clear()
+            dat = self.mappings[keys] = {
+                k: v
+                for k, v in mapping.items()
+                if k in keys
+            }
+        return dat
+
+    def observe(self, mapping: dict, props: dict, result: 'MiotResults' = None, now=None):
+        if now is None:
+            now = time.monotonic()
+        failed = not result or not result.is_valid or result.errors
+        for k in mapping:
+            inter = self.intervals.get(k, self.initial)
+            if not failed and f'{k}.error' not in props:
+                val = props.get(k)
+                if k not in self.values:
+                    pass
+                elif val != self.values[k]:
+                    inter = max(self.floor, inter / 2)
+                else:
+                    inter = min(self.ceiling, inter * 2)
+                self.values[k] = val
+            self.intervals[k] = inter
+            self.due[k] = now + inter
+        _LOGGER.debug('Adaptive polling intervals: %s', self.intervals)
+
+    def boost(self, params: list):
+        for p in params or []:
+            if not isinstance(p, dict):
+                continue
+            try:
+                k = self.names.get((int(p.get('siid')), int(p.get('piid'))))
+            except (TypeError, ValueError):
+                continue
+            if k is None:
+                continue
+            self.intervals[k] = self.floor
+            self.due[k] = 0
+
+
+class ChunkSizeStore(SharedStore):
+    """Learned chunk sizes of all devices, saved in one file."""
+    data_key = 'chunk_sizes'
+    filename = 'chunk-sizes.json'
+
+
 class MiioInfo(dict):
     def __getattr__(self, item):
         return self.get(item)
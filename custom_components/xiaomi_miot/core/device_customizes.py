@@ -26,6 +26,8 @@ from .converters import *
 
 CHUNK_1 = {
     'chunk_properties': 1,
+    'chunk_window': 1,
+    'miio_commands_window': 1,
 }
 
 ENERGY_KWH = {
@@ -1,4 +1,5 @@
 import logging
+import time
 from typing import TYPE_CHECKING, Optional, Callable
 from functools import cached_property
 
@@ -86,6 +87,9 @@ class XEntity(BasicEntity):
     _miot_service: Optional[MiotService] = None
     _miot_property: Optional[MiotProperty] = None
     _miot_action: Optional[MiotAction] = None
+    _last_write = 0
+    state_writes = 0
+    skipped_writes = 0
 
     def __init__(self, device: 'Device', conv: 'BaseConv'):
         self.device = device
@@ -132,6 +136,8 @@ class XEntity(BasicEntity):
         self._attr_unique_id = f'{device.unique_id}-{convert_unique_id(conv)}'
         self._attr_device_info = self.device.hass_device_info
         self._attr_extra_state_attributes = {}
+        self._last_written = None
+        self._state_heartbeat = self.custom_config_integer('state_heartbeat') or 0
 
         self._attr_icon = conv.option.get('icon')
         self._attr_device_class = self.custom_config('device_class') or conv.option.get('device_class')
@@ -166,7 +172,7 @@ class XEntity(BasicEntity):
                     break
 
         self.on_init()
-        self.device.add_listener(self.on_device_update)
+        self.device.add_listener(self.on_device_update, self.listen_attrs)
 
     @cached_property
     def model(self):
@@ -209,10 +215,37 @@ class XEntity(BasicEntity):
                     self._attr_extra_state_attributes[conv.attr] = self.device.props.get(conv.attr)
 
         if state_change and self.added:
+            now = time.monotonic()
+            snapshot = self.state_snapshot()
+            if (
+                snapshot is not None
+                and snapshot == self._last_written
+                and not (self._state_heartbeat and now - self._last_write >= self._state_heartbeat)
+            ):
+                self.skipped_writes += 1
+                _LOGGER.debug('%s: Entity state not changed, skipped %s writes', self.entity_id, self.skipped_writes)
+                return
             self._async_write_ha_state()
+            self._last_written = snapshot
+            self._last_write = now
+            self.state_writes += 1
             state = data.get(self.attr, data)
             _LOGGER.debug('%s: Entity state updated: %s', self.entity_id, state)
 
+    def state_snapshot(self):
+        """State and attributes a write would publish, None if they can not be rendered."""
+        try:
+            return (
+                self.available,
+                self.state,
+                self.state_attributes,
+                dict(self.extra_state_attributes or {}),
+                self.icon,
+                self.entity_picture,
+            )
+        except Exception:
+            return None
+
     def get_state(self) -> dict:
         """Run before entity remove if entity is subclass from RestoreEntity."""
         return {}
@@ -236,6 +269,8 @@ class XEntity(BasicEntity):
             data: RestoredExtraData = await call()
             if data and self.listen_attrs & data.as_dict().keys():
                 self.set_state(data.as_dict())
+                self._last_written = None
+                self.device.reset_dispatched()
 
     async def async_will_remove_from_hass(self) -> None:
         self.device.remove_listener(self.on_device_update)
@@ -1,3 +1,4 @@
+import time
 import logging
 import asyncio
 from typing import TYPE_CHECKING
@@ -6,6 +7,7 @@ from homeassistant.const import CONF_USERNAME
 from homeassistant.config_entries import ConfigEntry, ConfigEntryState
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from .const import SUPPORTED_DOMAINS
+from .miot_spec import MiotSpec
 from .xiaomi_cloud import MiotCloud
 
 if TYPE_CHECKING:
@@ -99,6 +101,40 @@ class HassEntry:
         await device.async_init()
         return device
 
+    async def async_prefetch_specs(self, devices: list[dict], limit=4):
+        """Load the specs of all devices concurrently, so that their init only reads the shared cache."""
+        from .device import Device, DeviceInfo
+        types = {}
+        for dat in devices:
+            # resolve the type and options like the device init does
+            device = Device(DeviceInfo(dat), self)
+            try:
+                urn = await device.get_urn()
+            except Exception as exc:
+                _LOGGER.warning('Get miot type for %s failed: %s', device.model, exc)
+                continue
+            if not urn:
+                continue
+            types.setdefault((urn, bool(device.trans_options)), device.model)
+        if not types:
+            return
+
+        sem = asyncio.Semaphore(limit)
+
+        async def _fetch(urn, trans_options):
+            async with sem:
+                await MiotSpec.async_from_type(self.hass, urn, trans_options=trans_options)
+
+        start = time.monotonic()
+        results = await asyncio.gather(
+            *[_fetch(*key) for key in types],
+            return_exceptions=True,
+        )
+        for key, res in zip(types, results):
+            if isinstance(res, Exception):
+                _LOGGER.warning('Prefetch miot spec for %s failed: %s', types[key], res)
+        _LOGGER.info('Prefetched %s miot specs in %.2fs', len(types), time.monotonic() - start)
+
     def new_adder(self, domain, adder: AddEntitiesCallback):
         self.adders[domain] = adder
         _LOGGER.info('New adder: %s', [domain, adder])
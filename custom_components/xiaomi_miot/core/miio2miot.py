@@ -1,4 +1,5 @@
 import time
+import asyncio
 import logging
 import voluptuous as vol
 from typing import Tuple
@@ -9,9 +10,9 @@ from .utils import (
     rgb_to_int,
     int_to_rgb,
 )
-from .templates import template
+from .templates import template, render_template
 from .miot_spec import (MiotSpec, MiotProperty, MiotAction)
-from .miio2miot_specs import MIIO_TO_MIOT_SPECS
+from .const import MIIO_TO_MIOT_SPECS
 import homeassistant.helpers.config_validation as cv
 
 
@@ -36,6 +37,7 @@ class Miio2MiotHelper:
                 self.miio_props.append(p)
         self.extend_miio_props(config.get('miio_props', []))
         self.miio_props_values = {}
+        self.commands_timing = {}
 
     @staticmethod
     def from_model(hass, model, miot_spec, from_model=None):
@@ -71,17 +73,15 @@ class Miio2MiotHelper:
             except TypeError:
                 _LOGGER.error('%s: Got TypeError while get_prop(%s)', self.model, self.miio_props, exc_info=True)
         if cls := self.config.get('miio_commands'):
-            for c in cls:
-                if dly := c.get('delay', 0):
-                    time.sleep(dly)
-                pms = c.get('params', [])
-                try:
-                    vls = await device.async_send(c['method'], pms)
-                except (DeviceException, OSError, TypeError, UnboundLocalError) as exc:
-                    if is_offline_exception(exc):
-                        raise exc
+            for c, vls in zip(cls, await self.async_send_miio_commands(device, cls)):
+                if isinstance(vls, BaseException):
+                    if is_offline_exception(vls):
+                        raise vls
                     if not c.get('ignore_error'):
-                        _LOGGER.error('%s: Got MiioException: %s while %s(%s)', self.model, exc, c['method'], pms)
+                        _LOGGER.error(
+                            '%s: Got MiioException: %s while %s(%s)',
+                            self.model, vls, c['method'], c.get('params', []),
+                        )
                     continue
                 kls = c.get('values', [])
                 if kls is True:
@@ -109,6 +109,47 @@ class Miio2MiotHelper:
         _LOGGER.debug('%s: Got miio props for miot: %s', self.model, dic)
         return dic
 
+    async def async_send_miio_commands(self, device, commands: list):
+        """Send the commands, results or exceptions are in the same order as the commands.
+
+        A command with a delay waits for all commands before it and then sleeps,
+        the others are sent concurrently, at most `miio_commands_window` of the device at once.
+        """
+        results = [None] * len(commands)
+        sem = asyncio.Semaphore(max(getattr(device, 'miio_commands_window', 1) or 1, 1))
+
+        async def _send(idx, cmd):
+            # by position in the config, params may change on every poll
+            key = f"{idx}.{cmd['method']}"
+            async with sem:
+                start = time.monotonic()
+                try:
+                    return await device.async_send(cmd['method'], cmd.get('params', []))
+                finally:
+                    self.commands_timing[key] = round(time.monotonic() - start, 3)
+
+        async def _send_stage(stage):
+            # a failed command must not cancel the others
+            outs = await asyncio.gather(*[_send(idx, cmd) for idx, cmd in stage], return_exceptions=True)
+            for (idx, _), out in zip(stage, outs):
+                results[idx] = out
+
+        stage = []
+        for idx, cmd in enumerate(commands):
+            if dly := cmd.get('delay', 0):
+                if stage:
+                    await _send_stage(stage)
+                    stage = []
+                    if any(is_offline_exception(r) for r in results if isinstance(r, BaseException)):
+                        # the rest would fail as well
+                        return results
+                await asyncio.sleep(dly)
+            stage.append((idx, cmd))
+        if stage:
+            await _send_stage(stage)
+        _LOGGER.debug('%s: Miio commands timing: %s', self.model, self.commands_timing)
+        return results
+
     async def async_get_miot_props(self, device, mapping: dict = None):
         if mapping is None:
             mapping = device.mapping or {}
@@ -127,8 +168,7 @@ class Miio2MiotHelper:
                     fmt = c.get('format')
                     try:
                         if tpl := c.get('template', {}):
-                            tpl = template(tpl, self.hass)
-                            val = tpl.async_render({
+                            val = render_template(tpl, self.hass, {
                                 'value': val,
                                 'props': dic,
                                 'dict': c.get('dict', {}),
@@ -184,8 +224,7 @@ class Miio2MiotHelper:
             mph = MiioPropertyHelper(prop, reverse=True)
             fmt = cfg.get('format')
             if tpl := cfg.get('set_template'):
-                tpl = template(tpl, self.hass)
-                pms = tpl.async_render({
+                pms = render_template(tpl, self.hass, {
                     'value': value,
                     'props': self.miio_props_values,
                     'dict': cfg.get('dict', {}),
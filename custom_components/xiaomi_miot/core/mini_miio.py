@@ -5,14 +5,15 @@ import json
 import logging
 import random
 import socket
+import struct
 import time
+import weakref
 from asyncio import DatagramProtocol, Future
 from asyncio.protocols import BaseProtocol
 from asyncio.transports import DatagramTransport
-from typing import Union
+from typing import Optional, Union
 
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
 _LOGGER = logging.getLogger(__package__ + ".miio")
@@ -21,6 +22,12 @@ HELLO = bytes.fromhex(
     "21310020ffffffffffffffffffffffffffffffffffffffffffffffffffffffff"
 )
 
+# magic, length, unknown, device_id, timestamp
+HEADER = struct.Struct(">HHIII")
+# PKCS7 padding by length of the last block
+PADDING = [bytes((16 - i,)) * (16 - i) for i in range(16)]
+JSON_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
 
 class BasemiIO:
     """A simple class that implements the miIO protocol."""
@@ -41,41 +48,50 @@ class BasemiIO:
         )
 
     def _encrypt(self, plaintext: bytes):
-        padder = padding.PKCS7(128).padder()
-        padded_plaintext = padder.update(plaintext) + padder.finalize()
-
         encryptor = self.cipher.encryptor()
-        return encryptor.update(padded_plaintext) + encryptor.finalize()
+        return encryptor.update(plaintext + PADDING[len(plaintext) % 16]) + encryptor.finalize()
 
-    def _decrypt(self, ciphertext: bytes):
+    def _decrypt(self, ciphertext: Union[bytes, memoryview]):
         decryptor = self.cipher.decryptor()
-        padded_plaintext = decryptor.update(ciphertext) + decryptor.finalize()
+        plain = decryptor.update(ciphertext) + decryptor.finalize()
 
-        unpadder = padding.PKCS7(128).unpadder()
-        return unpadder.update(padded_plaintext) + unpadder.finalize()
+        pad = plain[-1] if plain else 0
+        if not 0 < pad <= 16 or plain[-pad:] != PADDING[16 - pad]:
+            raise ValueError("Invalid padding bytes")
+        return plain[:-pad]
 
     def _pack_raw(self, msg_id: int, method: str, params: Union[dict, list] = None):
         # latest zero unnecessary
         payload = (
-            json.dumps(
-                {"id": msg_id, "method": method, "params": params or []},
-                separators=(",", ":"),
+            JSON_ENCODER.encode(
+                {"id": msg_id, "method": method, "params": params or []}
             ).encode()
             + b"\x00"
         )
+        size = 32 + len(payload) + 16 - len(payload) % 16
+
+        # encrypt straight into the packet, update_into needs one spare block
+        raw = bytearray(size + 15)
+        with memoryview(raw) as view:
+            encryptor = self.cipher.encryptor()
+            encryptor.update_into(payload + PADDING[len(payload) % 16], view[32:])
+            encryptor.finalize()
+            HEADER.pack_into(
+                view,
+                0,
+                0x2131,
+                size,  # total length
+                0,  # unknow
+                self.device_id,
+                int(time.time() - self.delta_ts),
+            )
+            checksum = hashlib.md5(view[:16])
+            checksum.update(self.token)
+            checksum.update(view[32:size])
+            view[16:32] = checksum.digest()
+        del raw[size:]
 
-        data = self._encrypt(payload)
-
-        raw = b"\x21\x31"
-        raw += (32 + len(data)).to_bytes(2, "big")  # total length
-        raw += b"\x00\x00\x00\x00"  # unknow
-        raw += self.device_id.to_bytes(4, "big")
-        raw += int(time.time() - self.delta_ts).to_bytes(4, "big")
-
-        raw += hashlib.md5(raw + self.token + data).digest()
-        raw += data
-
-        assert len(raw) < 1024, "Exceeded message size"
+        assert size < 1024, "Exceeded message size"
 
         return raw
 
@@ -86,7 +102,7 @@ class BasemiIO:
         # device_id = int.from_bytes(raw[8:12], 'big')
         # ts = int.from_bytes(raw[12:16], 'big')
         # checksum = raw[16:32]
-        return self._decrypt(raw[32:])
+        return self._decrypt(memoryview(raw)[32:])
 
 
 class SyncMiIO(BasemiIO):
@@ -203,70 +219,204 @@ class SyncMiIO(BasemiIO):
         return self.send("miIO.info")
 
 
-# noinspection PyUnusedLocal
-class AsyncSocket(DatagramProtocol):
-    timeout = 0
+class MiioTransport(DatagramProtocol):
+    """Long-lived UDP endpoint shared by all AsyncMiIO instances on the event
+    loop. Replies are routed back to the device that sent the request and
+    matched to the waiting call by message id.
+    """
+
+    _endpoints: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = (
+        weakref.WeakKeyDictionary()
+    )
     transport: DatagramTransport = None
-    response: Future = None
 
     def __init__(self):
-        self.response = asyncio.get_event_loop().create_future()
+        self.clients: dict[str, list["AsyncMiIO"]] = {}
+
+    @classmethod
+    async def async_get(cls) -> "MiioTransport":
+        loop = asyncio.get_running_loop()
+        task = cls._endpoints.get(loop)
+        if task is None or (
+            task.done()
+            and (task.cancelled() or task.exception() or task.result().closed)
+        ):
+            task = loop.create_task(cls._async_create(loop))
+            cls._endpoints[loop] = task
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _async_create(loop: asyncio.AbstractEventLoop) -> "MiioTransport":
+        _, protocol = await loop.create_datagram_endpoint(
+            MiioTransport, local_addr=("0.0.0.0", 0), family=socket.AF_INET
+        )
+        return protocol
+
+    @property
+    def closed(self) -> bool:
+        return not self.transport or self.transport.is_closing()
 
     def connection_made(self, transport: DatagramTransport):
-        # _LOGGER.debug(f"connection_made {transport}")
         self.transport = transport
 
-    def datagram_received(self, data: bytes, addr):
-        # _LOGGER.debug(f"datagram_received {data}")
-        self.response.set_result(data)
+    def connection_lost(self, exc):
+        self.transport = None
+        for clients in list(self.clients.values()):
+            for client in clients:
+                client.connection_lost(exc)
+        self.clients.clear()
 
-    def settimeout(self, value: int):
-        self.timeout = value
+    def error_received(self, exc: Exception):
+        # unconnected socket, so ICMP errors can't be matched to a device,
+        # the waiting request will time out instead
+        _LOGGER.debug(f"transport error: {exc}")
 
-    def sendto(self, data: bytes):
-        self.transport.sendto(data)
+    def datagram_received(self, data: bytes, addr):
+        for client in list(self.clients.get(addr[0], ())):
+            if client.datagram_received(data):
+                break
+
+    def sendto(self, data: bytes, addr: tuple[str, int]):
+        if self.closed:
+            raise ConnectionError("miio transport is closed")
+        self.transport.sendto(data, addr)
+
+    def register(self, client: "AsyncMiIO"):
+        clients = self.clients.setdefault(client.addr[0], [])
+        if client not in clients:
+            clients.append(client)
+
+    def unregister(self, client: "AsyncMiIO"):
+        clients = self.clients.get(client.addr[0])
+        if clients and client in clients:
+            clients.remove(client)
+        if not clients:
+            self.clients.pop(client.addr[0], None)
 
     def close(self):
-        if not self.transport:
+        if self.closed:
             return
         try:
             self.transport.close()
         except Exception as e:
-            _LOGGER.error("Error when closing async socket", exc_info=e)
-
-    async def connect(self, addr: tuple[str, int]):
-        coro = asyncio.get_event_loop().create_datagram_endpoint(
-            lambda: self, remote_addr=addr
-        )
-        if self.timeout:
-            await asyncio.wait_for(coro, self.timeout)
-        else:
-            await coro
-
-    async def recv(self, *args):
-        self.response = asyncio.get_event_loop().create_future()
-        if self.timeout:
-            return await asyncio.wait_for(self.response, self.timeout)
-        return await self.response
+            _LOGGER.error("Error when closing miio transport", exc_info=e)
 
 
 # noinspection PyMethodMayBeStatic,PyTypeChecker
 class AsyncMiIO(BasemiIO, BaseProtocol):
-    async def ping(self, sock: AsyncSocket) -> bool:
-        """Returns `true` if the connection to the miio device is working. The
-        token is not verified at this stage.
+    """Asynchronous miIO protocol. All requests go through the shared
+    `MiioTransport`, so there is no socket setup per request and several
+    requests to the same device can be in flight at once.
+    """
+
+    def __init__(self, host: str, token: str, timeout: float = 3):
+        super().__init__(host, token, timeout)
+        self._pending: dict[int, Future] = {}
+        self._hello: Optional[Future] = None
+        self._hello_lock = asyncio.Lock()
+
+    def datagram_received(self, raw: bytes) -> bool:
+        """Handle a packet from the device host. Returns `true` if the packet
+        belongs to this instance.
         """
-        try:
-            sock.sendto(HELLO)
-            raw = await sock.recv(1024)
-            if raw[:2] == b"\x21\x31":
-                self.device_id = int.from_bytes(raw[8:12], "big")
-                self.delta_ts = time.time() - int.from_bytes(raw[12:16], "big")
+        if raw[:2] != b"\x21\x31":
+            return False
+        if len(raw) == 32:
+            # answer on HELLO
+            if self._hello and not self._hello.done():
+                self._hello.set_result(raw)
                 return True
+            return False
+        try:
+            data = self._unpack_raw(raw).rstrip(b"\x00")
         except Exception:
-            pass
+            # encrypted with another token
+            return False
+
+        if data == b"":
+            # mgl03 fw 1.4.6_0012 without Internet respond on miIO.info
+            # command with empty answer, it can be matched only if there is
+            # a single request in flight
+            if len(self._pending) == 1:
+                fut = next(iter(self._pending.values()))
+                if not fut.done():
+                    fut.set_result(None)
+            return True
+
+        try:
+            data = json.loads(data)
+            fut = self._pending.get(data["id"])
+        except (ValueError, TypeError, KeyError):
+            return False
+        if fut is None or fut.done():
+            _LOGGER.debug(f"{self.addr[0]} | wrong answer ID")
+            return True
+
+        # follow the device clock, so handshake is needed only after failure
+        self._sync_ts(raw)
+        fut.set_result(data)
+        return True
+
+    def connection_lost(self, exc):
+        err = exc or ConnectionError("miio transport is closed")
+        for fut in self._pending.values():
+            if not fut.done():
+                fut.set_exception(err)
+        if self._hello and not self._hello.done():
+            self._hello.set_exception(err)
+
+    def _sync_ts(self, raw: bytes):
+        self.device_id = int.from_bytes(raw[8:12], "big")
+        self.delta_ts = time.time() - int.from_bytes(raw[12:16], "big")
+
+    def _release(self, transport: MiioTransport):
+        if not self._pending and self._hello is None:
+            transport.unregister(self)
+
+    async def ping(self) -> bool:
+        """Returns `true` if the connection to the miio device is working. The
+        token is not verified at this stage. Concurrent requests share one
+        handshake.
+        """
+        async with self._hello_lock:
+            if self.delta_ts is not None:
+                return True
+            transport = None
+            try:
+                transport = await MiioTransport.async_get()
+                self._hello = asyncio.get_running_loop().create_future()
+                transport.register(self)
+                transport.sendto(HELLO, self.addr)
+                raw = await asyncio.wait_for(self._hello, self.timeout)
+                self._sync_ts(raw)
+                return True
+            except Exception:
+                pass
+            finally:
+                self._hello = None
+                if transport:
+                    self._release(transport)
         return False
 
+    async def request(self, method: str, params: Union[dict, list] = None):
+        """Send one packet and wait for the answer with the same message id.
+        Returns `None` on empty answer.
+        """
+        transport = await MiioTransport.async_get()
+        msg_id = random.randint(100000000, 999999999)
+        while msg_id in self._pending:
+            msg_id = random.randint(100000000, 999999999)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = fut
+        transport.register(self)
+        try:
+            transport.sendto(self._pack_raw(msg_id, method, params), self.addr)
+            # can receive more than 1024 bytes (1056 approximate maximum)
+            return await asyncio.wait_for(fut, self.timeout)
+        finally:
+            self._pending.pop(msg_id, None)
+            self._release(transport)
+
     async def send(self, method: str, params: Union[dict, list] = None, tries=3):
         """Send command to miIO device and get result from it. Params can be
         dict or list depend on command.
@@ -279,48 +429,22 @@ class AsyncMiIO(BasemiIO, BaseProtocol):
         """
         offline = False
         for _ in range(0, tries):
-            sock = AsyncSocket()
-            sock.settimeout(self.timeout)
             try:
-                # create socket every time for reset connection, because we can
-                # reseive answer on previous request or request from another
-                # thread
-                await sock.connect(self.addr)
-
                 # need device_id for send command, can get it from ping cmd
-                if self.delta_ts is None and not await self.ping(sock):
+                if self.delta_ts is None and not await self.ping():
                     # device doesn't answered on ping
                     offline = True
                     continue
 
-                # pack each time for new message id
-                msg_id = random.randint(100000000, 999999999)
-                raw_send = self._pack_raw(msg_id, method, params)
-                sock.sendto(raw_send)
-                # can receive more than 1024 bytes (1056 approximate maximum)
-                raw_recv = await sock.recv(10240)
-                data = self._unpack_raw(raw_recv).rstrip(b"\x00")
-
-                if data == b"":
-                    # mgl03 fw 1.4.6_0012 without Internet respond on miIO.info
-                    # command with empty answer
-                    continue
-
-                data = json.loads(data)
-                # check if we received response for our cmd
-                if data["id"] != msg_id:
-                    _LOGGER.debug(f"{self.addr[0]} | wrong answer ID")
-                    continue
-
-                return data
+                data = await self.request(method, params)
+                if data is not None:
+                    return data
 
             except (asyncio.TimeoutError, OSError):
                 # OSError: [Errno 101] Network unreachable
                 pass
             except Exception as e:
                 _LOGGER.debug(f"{self.addr[0]} | {method}", exc_info=e)
-            finally:
-                sock.close()
 
             # init ping again
             self.delta_ts = None
@@ -332,22 +456,56 @@ class AsyncMiIO(BasemiIO, BaseProtocol):
         _LOGGER.debug(f"{self.addr[0]} | No answer on {method} {params}")
         return {}
 
-    async def send_bulk(self, method: str, params: list, chunk: int = 0) -> list:
+    async def send_bulk(
+        self, method: str, params: list, chunk: int = 0, window: int = 1
+    ) -> list:
         """Sends a command with a large number of parameters. Splits into
-        multiple requests when the size of one request is exceeded.
+        multiple requests when the size of one request is exceeded, and keeps
+        up to `window` of them in flight. Params of a failed chunk are
+        reported one by one with `chunk_failed`.
         """
         if not chunk:
             chunk = 15
-        try:
-            result = []
-            for i in range(0, len(params), chunk):
-                resp = await self.send(method, params[i : i + chunk])
+        chunks = [params[i : i + chunk] for i in range(0, len(params), chunk)]
+        sem = asyncio.Semaphore(max(window or 1, 1))
+
+        async def _send(pms: list):
+            async with sem:
+                return await self.send(method, pms)
+
+        resps = await asyncio.gather(*[_send(pms) for pms in chunks])
+        result = []
+        failed = 0
+        for pms, resp in zip(chunks, resps):
+            try:
                 result += resp["result"]
-            return result
-        except Exception:
+            except (KeyError, TypeError):
+                failed += 1
+                result += chunk_failed(pms, resp)
+        if chunks and failed == len(chunks):
             return None
+        return result
 
     async def info(self, tries: int = 3) -> dict | None:
         """Get info about miIO device."""
         resp = await self.send("miIO.info", tries=tries)
         return resp.get("result") if resp else resp
+
+
+def chunk_failed(params: list, resp) -> list:
+    """Placeholders for the params of a chunk without a valid answer. Miot
+    properties get an error code, other params get `None` so that results
+    stay aligned with the request.
+    """
+    err = resp.get("error") if isinstance(resp, dict) else None
+    if isinstance(err, dict):
+        code = err.get("code", -1)
+        err = err.get("message")
+    else:
+        code = -1
+    if not err:
+        err = "No response" if resp is not None else "Device offline"
+    return [
+        {**p, "code": code, "error": err} if isinstance(p, dict) else None
+        for p in params
+    ]
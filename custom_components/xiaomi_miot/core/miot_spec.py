@@ -1,10 +1,11 @@
+import re
+import sys
+import copy
 import logging
 import asyncio
 import platform
 import random
 import time
-import re
-from functools import cached_property
 from collections.abc import Iterable
 
 from homeassistant.core import HomeAssistant
@@ -77,16 +78,32 @@ SPEC_ERRORS = {
 }
 
 
+def mapping_cache_key(*args):
+    """Hashable key of the mapping arguments, or None if they can't be hashed."""
+    key = tuple(
+        tuple(v) if isinstance(v, (list, tuple)) else v
+        for v in args
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
 # https://iot.mi.com/new/doc/tools-and-resources/design/spec/overall
 # https://iot.mi.com/new/doc/tools-and-resources/design/spec/xiaoai
 # https://iot.mi.com/new/doc/tools-and-resources/design/spec/shortcut
 class MiotSpecInstance:
+    __slots__ = ('raw', 'iid', 'type', 'name', 'description', '_translations')
+
     def __init__(self, dat: dict):
         self.raw = dat
         self.iid = int(dat.get('iid') or 0)
-        self.type = str(dat.get('type') or '')
-        self.name = self.name_by_type(self.type)
-        self.description = dat.get('description') or ''
+        self.type = sys.intern(str(dat.get('type') or ''))
+        self.name = sys.intern(self.name_by_type(self.type))
+        self.description = sys.intern(dat.get('description') or '')
+        self._translations = None
 
     @staticmethod
     def format_name(nam):
@@ -108,8 +125,10 @@ class MiotSpecInstance:
     def translation_keys(self):
         return ['_globals']
 
-    @cached_property
+    @property
     def translations(self):
+        if self._translations is not None:
+            return self._translations
         dic = TRANSLATION_LANGUAGES
         kls = self.translation_keys
         for k in kls:
@@ -117,6 +136,7 @@ class MiotSpecInstance:
             if not isinstance(d, dict):
                 continue
             dic = {**dic, **d}
+        self._translations = dic
         return dic
 
     def get_translation(self, des, viid=None, spec=True):
@@ -159,6 +179,11 @@ class MiotSpecInstance:
 
 # https://iot.mi.com/new/doc/design/spec/xiaoai
 class MiotSpec(MiotSpecInstance):
+    SPEC_HOSTS = [
+        'https://miot-spec.org',
+        'https://spec.miot-spec.com',
+    ]
+
     def __init__(self, hass: HomeAssistant, dat: dict, translations=None, trans_options=None):
         self.hass = hass
         self.trans_options = trans_options
@@ -170,25 +195,76 @@ class MiotSpec(MiotSpecInstance):
         self.specs = {}
         self.custom_mapping = None
         self.custom_mapping_names = {}
+        self._mappings = {}
         self.extend_specs(services=dat.get('services') or [])
 
+    def __copy__(self):
+        """Copy for a device, sharing the services until they are changed via `own_service`."""
+        obj = self.__class__.__new__(self.__class__)
+        for k in MiotSpecInstance.__slots__:
+            setattr(obj, k, getattr(self, k))
+        obj.__dict__.update(self.__dict__)
+        obj.services = {**self.services}
+        obj.services_count = {**self.services_count}
+        obj.services_properties = {**self.services_properties}
+        obj.specs = {**self.specs}
+        obj.custom_mapping_names = {**self.custom_mapping_names}
+        obj._mappings = {}
+        return obj
+
+    def own_service(self, siid) -> 'MiotService':
+        """Copy the shared service before changing it."""
+        srv = self.services[siid]
+        if srv.spec is not self:
+            srv = copy.copy(srv)
+            srv.spec = self
+            srv.properties = {**srv.properties}
+            srv.actions = {**srv.actions}
+            srv._mappings = {}
+            self.services[siid] = srv
+            self._mappings = {}
+        return srv
+
+    def own_property(self, prop: 'MiotProperty') -> 'MiotProperty':
+        """Copy the shared property before changing it."""
+        srv = self.own_service(prop.siid)
+        if prop.service is not srv:
+            prop = copy.copy(prop)
+            prop.service = srv
+            srv.properties[prop.iid] = prop
+            self.specs[prop.unique_prop] = prop
+        # the caller is about to change it
+        srv._mappings = {}
+        self._mappings = {}
+        return prop
+
     def extend_specs(self, services: list):
         for s in (services or []):
             srv = MiotService(s, self)
             if srv.iid in self.services:
-                self.services[srv.iid].extend_specs(
+                self.own_service(srv.iid).extend_specs(
                     properties=s.get('properties') or [],
                     actions=s.get('actions') or [],
                 )
             elif srv.name:
                 self.services[srv.iid] = srv
+        self._mappings = {}
 
     def services_mapping(self, *args, **kwargs):
-        dat = None
         eps = kwargs.pop('exclude_properties', [])
         ips = kwargs.pop('include_properties', [])
         urp = kwargs.pop('unreadable_properties', None)
-        sls = self.get_services(*args, **kwargs)
+        key = mapping_cache_key(args, kwargs.get('excludes'), eps, ips, bool(urp))
+        if key is not None and key in self._mappings:
+            dat = self._mappings[key]
+            return None if dat is None else {**dat}
+        dat = self._services_mapping(self.get_services(*args, **kwargs), eps, ips, urp)
+        if key is not None:
+            self._mappings[key] = dat
+        return None if dat is None else {**dat}
+
+    def _services_mapping(self, sls, eps, ips, urp):
+        dat = None
         if self.custom_mapping:
             sis = list(map(lambda x: x.iid, sls))
             dat = {
@@ -207,27 +283,33 @@ class MiotSpec(MiotSpecInstance):
     def set_custom_mapping(self, mapping: dict):
         self.custom_mapping = mapping
         self.custom_mapping_names = {}
+        self._mappings = {}
         for k, v in mapping.items():
             u = self.unique_prop(v, valid=True)
             if not u:
                 continue
             self.custom_mapping_names[u] = k
-        for s in self.services.values():
-            for p in s.properties.values():
+        for s in list(self.services.values()):
+            for p in list(s.properties.values()):
                 u = self.unique_prop(s.iid, p.iid)
                 n = self.custom_mapping_names.get(u)
-                if not n:
+                if not n or p.full_name == n:
                     continue
-                p.full_name = n
+                self.own_property(p).full_name = n
 
     def get_services(self, *args, **kwargs):
-        excludes = kwargs.get('excludes') or []
-        excludes.append('device_information')
-        return [
+        excludes = [*(kwargs.get('excludes') or []), 'device_information']
+        key = mapping_cache_key('services', args, excludes)
+        if key is not None and key in self._mappings:
+            return [*self._mappings[key]]
+        sls = [
             s
             for s in self.services.values()
             if not s.in_list(excludes) and (not args or s.in_list(args))
         ]
+        if key is not None:
+            self._mappings[key] = sls
+        return [*sls]
 
     def get_service(self, *args):
         for a in args:
@@ -291,63 +373,101 @@ class MiotSpec(MiotSpecInstance):
     async def async_get_model_type(hass, model, use_remote=False):
         if not model:
             return None
-        fnm = f'{DOMAIN}/instances.json'
-        store = Store(hass, 1, fnm)
-        try:
-            cached = await store.async_load() or {}
-        except (ValueError, HomeAssistantError):
-            await store.async_remove()
-            cached = {}
-        now = int(time.time())
-        dat = {}
-        if not use_remote:
-            dat = cached
-            ptm = dat.pop('_updated_time', 0)
-            if dat and now - ptm > 86400 * 7:
-                dat = {}
-        if not dat:
+        types = await MiotSpec.async_get_model_types(hass, use_remote)
+        return types.get(model)
+
+    @staticmethod
+    async def async_get_model_types(hass, use_remote=False) -> dict:
+        """Model to miot type index of all spec instances, loaded once and shared by all devices."""
+        data = hass.data.setdefault(DOMAIN, {})
+        lock = data.setdefault('miot_types_lock', asyncio.Lock())
+        async with lock:
+            now = int(time.time())
+            types, ptm = data.get('miot_types') or ({}, 0)
+            if types and not use_remote and now - ptm <= 86400 * 7:
+                return types
+
+            fnm = f'{DOMAIN}/instances.json'
+            store = Store(hass, 1, fnm)
             try:
-                url = '/miot-spec-v2/instances?status=all'
-                dat = await MiotSpec.async_download_miot_spec(hass, url, tries=3, timeout=90)
-                if dat:
-                    sdt = {
-                        '_updated_time': now,
-                    }
-                    for v in (dat.get('instances') or []):
-                        m = v.get('model')
-                        o = sdt.get(m) or {}
-                        if o:
-                            if o.get('status') == 'released' and v.get('status') != o.get('status'):
-                                continue
-                            if v.get('version') < o.get('version'):
-                                continue
-                        v.pop('model', None)
-                        sdt[m] = v
-                    await store.async_save(sdt)
-                    dat = sdt
-                    _LOGGER.info(
-                        'Renew miot spec instances: %s, count: %s, model: %s',
-                        fnm, len(sdt) - 1, model,
-                    )
-            except (TypeError, ValueError, BaseException) as exc:
-                if not cached:
-                    raise exc
+                cached = await store.async_load() or {}
+            except (ValueError, HomeAssistantError):
+                await store.async_remove()
+                cached = {}
+            dat = {}
+            if not use_remote:
                 dat = cached
-                _LOGGER.warning('Get miot specs filed: %s, use cached.', exc)
-        typ = None
-        if 'instances' in dat:
-            for v in (dat.get('instances') or []):
-                if model == v.get('model'):
-                    typ = v.get('type')
-                    break
-        elif model in dat:
-            typ = dat[model].get('type')
-        return typ
+                ptm = dat.pop('_updated_time', 0)
+                if dat and now - ptm > 86400 * 7:
+                    dat = {}
+            if not dat:
+                try:
+                    url = '/miot-spec-v2/instances?status=all'
+                    dat = await MiotSpec.async_download_miot_spec(hass, url, tries=3, timeout=90)
+                    if dat:
+                        sdt = {
+                            '_updated_time': now,
+                        }
+                        for v in (dat.get('instances') or []):
+                            m = v.get('model')
+                            o = sdt.get(m) or {}
+                            if o:
+                                if o.get('status') == 'released' and v.get('status') != o.get('status'):
+                                    continue
+                                if v.get('version') < o.get('version'):
+                                    continue
+                            v.pop('model', None)
+                            sdt[m] = v
+                        await store.async_save(sdt)
+                        dat = sdt
+                        ptm = now
+                        _LOGGER.info('Renew miot spec instances: %s, count: %s', fnm, len(sdt))
+                except (TypeError, ValueError, BaseException) as exc:
+                    if not cached:
+                        raise exc
+                    dat = cached
+                    # try to renew again in an hour
+                    ptm = now - 86400 * 7 + 3600
+                    _LOGGER.warning('Get miot specs filed: %s, use cached.', exc)
+
+            if 'instances' in dat:
+                types = {}
+                for v in (dat.get('instances') or []):
+                    types.setdefault(v.get('model'), v.get('type'))
+            else:
+                types = {
+                    m: v.get('type')
+                    for m, v in dat.items()
+                    if isinstance(v, dict)
+                }
+            data['miot_types'] = (types, ptm)
+            return types
 
     @staticmethod
     async def async_from_type(hass, typ, trans_options=False):
+        """Spec shared by all devices of the type, copy it before customizing."""
         if not typ:
             return None
+        key = (typ, bool(trans_options))
+        tasks = hass.data.setdefault(DOMAIN, {}).setdefault('miot_spec_types', {})
+        if not (task := tasks.get(key)):
+            task = hass.async_create_task(MiotSpec.async_load_type(hass, typ, trans_options))
+            tasks[key] = task
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            if tasks.get(key) is task:
+                tasks.pop(key, None)
+            raise
+
+    @staticmethod
+    def clear_type_cache(hass, typ):
+        tasks = hass.data.get(DOMAIN, {}).get('miot_spec_types', {})
+        for key in [k for k in tasks if k[0] == typ]:
+            tasks.pop(key, None)
+
+    @staticmethod
+    async def async_load_type(hass, typ, trans_options=False):
         fnm = f'{DOMAIN}/{typ}.json'
         if platform.system() == 'Windows':
             fnm = fnm.replace(':', '_')
@@ -459,10 +579,12 @@ class MiotSpec(MiotSpecInstance):
     @staticmethod
     async def async_download_miot_spec(hass, path, tries=1, timeout=30):
         session = async_get_clientsession(hass)
-        hosts = [
-            'https://miot-spec.org',
-            'https://spec.miot-spec.com',
-        ]
+        data = hass.data.setdefault(DOMAIN, {})
+        hosts = [*MiotSpec.SPEC_HOSTS]
+        if (last := data.get('miot_spec_host')) in hosts:
+            # start with the host that worked last time
+            hosts.remove(last)
+            hosts.insert(0, last)
         exception = None
         while tries > 0:
             for host in hosts:
@@ -470,6 +592,7 @@ class MiotSpec(MiotSpecInstance):
                 try:
                     request = await session.get(url=url, timeout=timeout)
                     if request.status == 200:
+                        data['miot_spec_host'] = host
                         return await request.json() or {}
                     raise UserWarning(f'Got status code {request.status} when trying to request {url}')
                 except asyncio.TimeoutError as exc:
@@ -479,23 +602,27 @@ class MiotSpec(MiotSpecInstance):
                     exception = exc
                     _LOGGER.warning('Got exception %s when trying to request %s', exc, url)
             tries -= 1
-            await asyncio.sleep(1)
+            if tries > 0:
+                await asyncio.sleep(1)
         if exception:
             raise exception
 
 
 # https://miot-spec.org/miot-spec-v2/spec/services
 class MiotService(MiotSpecInstance):
+    __slots__ = ('spec', 'unique_name', 'desc_name', 'friendly_desc', 'properties', 'actions', '_mappings')
+
     def __init__(self, dat: dict, spec: MiotSpec):
         self.spec = spec
         super().__init__(dat)
-        self.unique_name = f'{self.name}-{self.iid}'
-        self.desc_name = self.format_desc_name(self.description, self.name)
+        self.unique_name = sys.intern(f'{self.name}-{self.iid}')
+        self.desc_name = sys.intern(self.format_desc_name(self.description, self.name))
         self.friendly_desc = self.get_translation(self.description or self.name)
         spec.services_count.setdefault(self.name, 0)
         spec.services_count[self.name] += 1
         self.properties = {}
         self.actions = {}
+        self._mappings = {}
         self.extend_specs(properties=dat.get('properties') or [], actions=dat.get('actions') or [])
 
     def in_list(self, lst):
@@ -533,24 +660,36 @@ class MiotService(MiotSpecInstance):
                 continue
             self.actions[act.iid] = act
             self.spec.specs[act.unique_prop] = act
+        self._mappings = {}
 
     @property
     def name_count(self):
         return self.spec.services_count.get(self.name) or 0
 
     def mapping(self, excludes=None, includes=None, **kwargs):
-        dat = {}
         if not isinstance(excludes, list):
             excludes = []
         if not isinstance(includes, list):
+            # existing behaviour, callers passing only excludes get every property
             excludes = []
+        urp = bool(kwargs.get('unreadable_properties'))
+        key = mapping_cache_key(excludes, includes, urp)
+        if key is not None and key in self._mappings:
+            return {**self._mappings[key]}
+        dat = self._mapping(excludes, includes, urp)
+        if key is not None:
+            self._mappings[key] = dat
+        return {**dat}
+
+    def _mapping(self, excludes, includes, unreadable_properties=False):
+        dat = {}
         for p in self.properties.values():
             if not isinstance(p, MiotProperty):
                 continue
             if not p.full_name:
                 continue
             if not p.readable:
-                if not kwargs.get('unreadable_properties'):
+                if not unreadable_properties:
                     continue
                 if not p.writeable:
                     continue
@@ -647,21 +786,100 @@ class MiotService(MiotSpecInstance):
         return icon
 
 
+UNIT_ALIASES = {
+    'celsius': UnitOfTemperature.CELSIUS,
+    'fahrenheit': UnitOfTemperature.FAHRENHEIT,
+    'kelvin': UnitOfTemperature.KELVIN,
+    'percentage': PERCENTAGE,
+    'lux': LIGHT_LUX,
+    'watt': UnitOfPower.WATT,
+    'pascal': UnitOfPressure.PA,
+    'μg/m3': CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
+    'mg/m3': CONCENTRATION_MILLIGRAMS_PER_CUBIC_METER,
+    'p/m3': CONCENTRATION_PARTS_PER_CUBIC_METER,
+}
+
+UNIT_NAMES = {
+    'current_step_count': 'steps',
+    'heart_rate': 'bpm',
+    'power_consumption': UnitOfEnergy.WATT_HOUR,
+    'electric_current': UnitOfElectricCurrent.AMPERE,
+    'voltage': UnitOfElectricPotential.VOLT,
+    'pm2_5_density': CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
+    'tds_in': CONCENTRATION_PARTS_PER_MILLION,
+    'tds_out': CONCENTRATION_PARTS_PER_MILLION,
+}
+
+STATE_CLASS_NAMES = {
+    'battery_level': SensorStateClass.MEASUREMENT,
+    'electric_power': SensorStateClass.MEASUREMENT,
+    'electric_current': SensorStateClass.MEASUREMENT,
+    'power_consumption': SensorStateClass.TOTAL_INCREASING,
+    'temperature': SensorStateClass.MEASUREMENT,
+    'relative_humidity': SensorStateClass.MEASUREMENT,
+    'humidity': SensorStateClass.MEASUREMENT,
+    'co2_density': SensorStateClass.MEASUREMENT,
+    'co_density': SensorStateClass.MEASUREMENT,
+    'pm2_5_density': SensorStateClass.MEASUREMENT,
+    'tvoc_density': SensorStateClass.MEASUREMENT,
+    'tds_in': SensorStateClass.MEASUREMENT,
+    'tds_out': SensorStateClass.MEASUREMENT,
+    'filter_used_flow': SensorStateClass.TOTAL_INCREASING,
+}
+
+ENTITY_ICONS = {
+    'co2_density': 'mdi:molecule-co2',
+    'current_step_count': 'mdi:walk',
+    'drying_level': 'mdi:tumble-dryer',
+    'filter_life_level': 'mdi:percent',
+    'filter_used_flow': 'mdi:water-percent',
+    'filter_used_time': 'mdi:clock',
+    'heart_rate': 'mdi:heart-pulse',
+    'mode': 'mdi:menu',
+    'nozzle_position': 'mdi:spray',
+    'on': 'mdi:power',
+    'pm2_5_density': 'mdi:air-filter',
+    'smoke_concentration': 'mdi:smoking',
+    'spin_speed': 'mdi:speedometer',
+    'target_temperature': 'mdi:coolant-temperature',
+    'target_water_level': 'mdi:water-plus',
+    'tds_in': 'mdi:water',
+    'tds_out': 'mdi:water-check',
+    'washing_strength': 'mdi:waves',
+}
+
+ENTITY_CATEGORY_NAMES = {
+    'battery_level': EntityCategory.DIAGNOSTIC.value,
+    'countdown_time': EntityCategory.CONFIG.value,
+    'fan_init_power_opt': EntityCategory.CONFIG.value,
+    'init_power_opt': EntityCategory.CONFIG.value,
+    'off_delay_time': EntityCategory.CONFIG.value,
+}
+
+
 # https://miot-spec.org/miot-spec-v2/spec/properties
 class MiotProperty(MiotSpecInstance):
+    __slots__ = (
+        'service', 'siid', 'unique_name', 'unique_prop', 'desc_name', 'friendly_name', 'friendly_desc',
+        'format', 'access', 'unit', 'value_list', 'value_range', 'full_name', 'readable', 'writeable',
+        '_unit_of_measurement', '_state_class', '_device_class', '_entity_icon', '_entity_category',
+    )
+
     def __init__(self, dat: dict, service: MiotService):
         self.service = service
         self.siid = service.iid
         super().__init__(dat)
-        self.unique_name = f'{service.unique_name}.{self.name}-{self.iid}'
-        self.unique_prop = self.service.unique_prop(piid=self.iid)
-        self.desc_name = self.format_desc_name(self.description, self.name)
-        self.friendly_name = f'{service.name}.{self.name}'
-        self.format = dat.get('format') or ''
-        self.access = dat.get('access') or []
-        self.unit = dat.get('unit') or ''
-        self.value_list = dat.get('value-list') or []
-        self.value_range = dat.get('value-range') or []
+        self.unique_name = sys.intern(f'{service.unique_name}.{self.name}-{self.iid}')
+        self.unique_prop = sys.intern(self.service.unique_prop(piid=self.iid))
+        self.desc_name = sys.intern(self.format_desc_name(self.description, self.name))
+        self.friendly_name = sys.intern(f'{service.name}.{self.name}')
+        self.format = sys.intern(dat.get('format') or '')
+        self.access = tuple(dat.get('access') or ())
+        self.unit = sys.intern(dat.get('unit') or '')
+        self.value_list = tuple(dat.get('value-list') or ())
+        self.value_range = tuple(dat.get('value-range') or ())
+        self.readable = 'read' in self.access
+        self.writeable = 'write' in self.access
         self.full_name = ''
         if self.name and service.name:
             if self.name == service.name:
@@ -683,11 +901,17 @@ class MiotProperty(MiotSpecInstance):
             elif len(self.full_name) >= 32:
                 # miot did length must less than 32
                 self.full_name = f'{self.desc_name}-{self.siid}-{self.iid}'
+            self.full_name = sys.intern(self.full_name)
             service.spec.services_properties[self.full_name] = {
                 'siid': self.siid,
                 'piid': self.iid,
             }
         self.friendly_desc = self.short_desc
+        self._unit_of_measurement = self.get_unit_of_measurement()
+        self._state_class = self.get_state_class()
+        self._entity_icon = self.get_entity_icon()
+        self._entity_category = self.get_entity_category()
+        self._device_class = None
 
     def in_list(self, lst, only_format=None, exclude_format=None):
         value_type = self.format
@@ -748,14 +972,6 @@ class MiotProperty(MiotSpecInstance):
         arr = des.split(' ')
         return ' '.join(dict(zip(arr, arr)).keys())
 
-    @property
-    def readable(self):
-        return 'read' in self.access
-
-    @property
-    def writeable(self):
-        return 'write' in self.access
-
     def generate_entity_id(self, entity, domain=None):
         eid = self.service.spec.generate_entity_id(entity, self.desc_name, domain)
         eid = re.sub(r'_(\d(?:_|$))', r'\1', eid)  # issue#153
@@ -938,64 +1154,46 @@ class MiotProperty(MiotSpecInstance):
 
     @property
     def unit_of_measurement(self):
+        return self._unit_of_measurement
+
+    @property
+    def state_class(self):
+        return self._state_class
+
+    @property
+    def device_class(self):
+        # depends on full_name, which can be renamed by a custom mapping
+        if not self._device_class or self._device_class[0] != self.full_name:
+            self._device_class = (self.full_name, self.get_device_class())
+        return self._device_class[1]
+
+    @property
+    def entity_icon(self):
+        return self._entity_icon
+
+    @property
+    def entity_category(self):
+        return self._entity_category
+
+    def get_unit_of_measurement(self):
         if self.value_list:
             return None
         name = self.name
         unit = self.unit
-        aliases = {
-            'celsius': UnitOfTemperature.CELSIUS,
-            'fahrenheit': UnitOfTemperature.FAHRENHEIT,
-            'kelvin': UnitOfTemperature.KELVIN,
-            'percentage': PERCENTAGE,
-            'lux': LIGHT_LUX,
-            'watt': UnitOfPower.WATT,
-            'pascal': UnitOfPressure.PA,
-            'μg/m3': CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
-            'mg/m3': CONCENTRATION_MILLIGRAMS_PER_CUBIC_METER,
-            'p/m3': CONCENTRATION_PARTS_PER_CUBIC_METER,
-        }
-        names = {
-            'current_step_count': 'steps',
-            'heart_rate': 'bpm',
-            'power_consumption': UnitOfEnergy.WATT_HOUR,
-            'electric_current': UnitOfElectricCurrent.AMPERE,
-            'voltage': UnitOfElectricPotential.VOLT,
-            'pm2_5_density': CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
-            'tds_in': CONCENTRATION_PARTS_PER_MILLION,
-            'tds_out': CONCENTRATION_PARTS_PER_MILLION,
-        }
-        if unit in aliases:
-            unit = aliases[unit]
-        elif name in names:
-            unit = names[name]
+        if unit in UNIT_ALIASES:
+            unit = UNIT_ALIASES[unit]
+        elif name in UNIT_NAMES:
+            unit = UNIT_NAMES[name]
         elif not unit or unit in ['none', 'null']:
             unit = None
         return unit
 
-    @property
-    def state_class(self):
-        names = {
-            'battery_level': SensorStateClass.MEASUREMENT,
-            'electric_power': SensorStateClass.MEASUREMENT,
-            'electric_current': SensorStateClass.MEASUREMENT,
-            'power_consumption': SensorStateClass.TOTAL_INCREASING,
-            'temperature': SensorStateClass.MEASUREMENT,
-            'relative_humidity': SensorStateClass.MEASUREMENT,
-            'humidity': SensorStateClass.MEASUREMENT,
-            'co2_density': SensorStateClass.MEASUREMENT,
-            'co_density': SensorStateClass.MEASUREMENT,
-            'pm2_5_density': SensorStateClass.MEASUREMENT,
-            'tvoc_density': SensorStateClass.MEASUREMENT,
-            'tds_in': SensorStateClass.MEASUREMENT,
-            'tds_out': SensorStateClass.MEASUREMENT,
-            'filter_used_flow': SensorStateClass.TOTAL_INCREASING,
-        }
-        if self.name in names and self.value_range:
-            return names[self.name]
+    def get_state_class(self):
+        if self.name in STATE_CLASS_NAMES and self.value_range:
+            return STATE_CLASS_NAMES[self.name]
         return None
 
-    @property
-    def device_class(self):
+    def get_device_class(self):
         ret = None
         name = self.full_name
         props = {
@@ -1030,71 +1228,47 @@ class MiotProperty(MiotSpecInstance):
                 break
         return ret
 
-    @property
-    def entity_icon(self):
+    def get_entity_icon(self):
         icon = None
         name = self.name
-        icons = {
-            'co2_density': 'mdi:molecule-co2',
-            'current_step_count': 'mdi:walk',
-            'drying_level': 'mdi:tumble-dryer',
-            'filter_life_level': 'mdi:percent',
-            'filter_used_flow': 'mdi:water-percent',
-            'filter_used_time': 'mdi:clock',
-            'heart_rate': 'mdi:heart-pulse',
-            'mode': 'mdi:menu',
-            'nozzle_position': 'mdi:spray',
-            'on': 'mdi:power',
-            'pm2_5_density': 'mdi:air-filter',
-            'smoke_concentration': 'mdi:smoking',
-            'spin_speed': 'mdi:speedometer',
-            'target_temperature': 'mdi:coolant-temperature',
-            'target_water_level': 'mdi:water-plus',
-            'tds_in': 'mdi:water',
-            'tds_out': 'mdi:water-check',
-            'washing_strength': 'mdi:waves',
-        }
         if name in ['heat_level']:
             icon = 'mdi:radiator'
             if self.service.name in ['seat']:
                 icon = 'mdi:car-seat-heater'
-        elif name in icons:
-            icon = icons[name]
+        elif name in ENTITY_ICONS:
+            icon = ENTITY_ICONS[name]
         elif self.service.name in ['oven', 'microwave_oven']:
             icon = 'mdi:microwave'
         elif self.service.name in ['health_pot']:
             return 'mdi:coffee'
         return icon
 
-    @property
-    def entity_category(self):
+    def get_entity_category(self):
         cate = None
         name = self.name
-        names = {
-            'battery_level': EntityCategory.DIAGNOSTIC.value,
-            'countdown_time': EntityCategory.CONFIG.value,
-            'fan_init_power_opt': EntityCategory.CONFIG.value,
-            'init_power_opt': EntityCategory.CONFIG.value,
-            'off_delay_time': EntityCategory.CONFIG.value,
-        }
-        if name in names:
-            cate = names[name]
+        if name in ENTITY_CATEGORY_NAMES:
+            cate = ENTITY_CATEGORY_NAMES[name]
         return cate
 
 
 # https://miot-spec.org/miot-spec-v2/spec/actions
 class MiotAction(MiotSpecInstance):
+    __slots__ = (
+        'service', 'siid', 'unique_name', 'unique_prop', 'full_name', 'friendly_name', 'friendly_desc',
+        'ins', 'out',
+    )
+
     def __init__(self, dat: dict, service: MiotService):
         self.service = service
         self.siid = service.iid
         super().__init__(dat)
-        self.unique_name = f'{service.unique_name}.{self.name}-{self.iid}'
-        self.unique_prop = self.service.unique_prop(aiid=self.iid)
-        self.full_name = f'{service.name}.{self.name}'
-        self.friendly_name = f'{service.name}.{self.name}'
+        self.unique_name = sys.intern(f'{service.unique_name}.{self.name}-{self.iid}')
+        self.unique_prop = sys.intern(self.service.unique_prop(aiid=self.iid))
+        self.full_name = sys.intern(f'{service.name}.{self.name}')
+        self.friendly_name = self.full_name
         self.friendly_desc = self.get_translation(self.description or self.name)
-        self.ins = dat.get('in') or []
-        self.out = dat.get('out') or []
+        self.ins = tuple(dat.get('in') or ())
+        self.out = tuple(dat.get('out') or ())
 
     def in_list(self, lst):
         pattern = convert_globs_to_pattern(lst)
@@ -1176,7 +1350,8 @@ class MiotResults:
 
     def __init__(self, results=None, mapping=None):
         self.mapping = mapping or {}
-        self.results: list[MiotResult] = []
+        self.values: list[dict] = []
+        self._wrapped = None
         if results:
             self.set_results(results)
 
@@ -1187,15 +1362,22 @@ class MiotResults:
         for v in results or []:
             if not isinstance(v, dict):
                 continue
-            r = MiotResult(v)
-            self.results.append(r)
-            if not self.has_error and not r.is_success:
-                self.has_error = r
+            self.values.append(v)
+            # only wrap the failed ones, 0: successful, 1: operation not completed
+            if not self.has_error and v.get('code') not in (0, 1):
+                self.has_error = MiotResult(v)
+        self._wrapped = None
         self.updated = now()
 
+    @property
+    def results(self) -> list['MiotResult']:
+        if self._wrapped is None:
+            self._wrapped = [MiotResult(v) for v in self.values]
+        return self._wrapped
+
     @property
     def is_empty(self):
-        return len(self.results) < 1
+        return not self.values
 
     @property
     def is_valid(self):
@@ -1216,22 +1398,22 @@ class MiotResults:
             rmp[u] = k
         if attrs is None:
             attrs = {}
-        for prop in self.results:
-            k = rmp.get(prop.unique_prop)
+        for v in self.values:
+            k = rmp.get(MiotSpec.unique_prop(v.get('siid'), piid=v.get('piid')))
             if k == None:
                 continue
-            e = prop.code
+            e = v.get('code')
             ek = f'{k}.error'
             if e == 0:
-                attrs[k] = prop.value
+                attrs[k] = v.get('value')
                 if ek in attrs:
                     attrs.pop(ek, None)
             else:
-                attrs[ek] = prop.spec_error
+                attrs[ek] = MiotSpec.spec_error(e)
         return attrs
 
     def to_json(self):
-        return [r.to_json() for r in self.results]
+        return self.values
 
     def __str__(self):
         return f'{self._results}'
@@ -1,3 +1,7 @@
+import re
+import math
+from ast import literal_eval
+from functools import lru_cache
 from homeassistant.helpers.template import Template
 
 CUSTOM_TEMPLATES = {
@@ -192,6 +196,88 @@ def template(value, hass):
     if isinstance(value, (list, dict, Template)):
         raise TypeError('template value should be a string')
     value = CUSTOM_TEMPLATES.get(value, value)
-    template_value = Template(str(value), hass)
+    return compiled_template(str(value), hass)
+
+
+@lru_cache(maxsize=512)
+def compiled_template(value: str, hass):
+    """Parsed templates are shared by source, they are only read when rendering."""
+    template_value = Template(value, hass)
     template_value.ensure_valid()
     return template_value
+
+
+def render_template(value, hass, variables: dict):
+    """Render a template, skipping jinja for the simple ones on `value`."""
+    if 'value' in variables and isinstance(value, str):
+        if fun := fast_template(CUSTOM_TEMPLATES.get(value, value)):
+            try:
+                return fun(variables['value'])
+            except (TypeError, ValueError, ArithmeticError):
+                # let jinja render it, or raise the same error as before
+                pass
+    return template(value, hass).async_render(variables)
+
+
+NUMBER = r'-?\d+(?:\.\d+)?'
+# pattern of the expression, indexes of the groups holding python literals, factory of the function
+FAST_TEMPLATES = [
+    (rf'value\s*(==|!=)\s*({NUMBER}|"[^"]*"|\'[^\']*\')', (1,), lambda op, x: (
+        (lambda v: v == x) if op == '==' else (lambda v: v != x)
+    )),
+    (r'value\s+(not\s+)?in\s+(\[[^\[\]]*\])', (1,), lambda neg, lst: (
+        (lambda v: v not in lst) if neg else (lambda v: v in lst)
+    )),
+    (r'not\s+value', (), lambda: lambda v: not v),
+    (rf'value\s*\|\s*int(?:\(0?\))?(?:\s*([-+*])\s*({NUMBER}))?', (1,), lambda op, x: (
+        lambda v: fast_number(fast_operate(int(fast_number(v)), op, x))
+    )),
+    (rf'value(\s*\|\s*default\(0,\s*true\))?\s*/\s*({NUMBER})', (1,), lambda dft, x: (
+        lambda v: fast_number(fast_number(v or 0 if dft else v) / x)
+    )),
+]
+
+
+@lru_cache(maxsize=512)
+def fast_template(source: str):
+    """Python function for a simple template like `{{ value|int + 1 }}`, or None."""
+    if not (match := re.fullmatch(r'\{\{\s*(.+?)\s*\}\}', source.strip())):
+        return None
+    expr = match.group(1)
+    for pattern, literals, factory in FAST_TEMPLATES:
+        if not (m := re.fullmatch(pattern, expr)):
+            continue
+        args = list(m.groups())
+        try:
+            for i in literals:
+                args[i] = fast_literal(args[i])
+        except (ValueError, SyntaxError):
+            # e.g. `value in [a, b]` with variables, jinja knows them
+            return None
+        return factory(*args)
+    return None
+
+
+def fast_literal(arg):
+    """Python value of a literal group, None if the optional group did not match."""
+    if arg is None:
+        return None
+    return literal_eval(arg)
+
+
+def fast_number(value):
+    if not isinstance(value, (int, float)):
+        raise TypeError(f'{value!r} is not a number')
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f'{value!r} is not finite')
+    return value
+
+
+def fast_operate(value, op, x):
+    if op == '+':
+        return value + x
+    if op == '-':
+        return value - x
+    if op == '*':
+        return value * x
+    return value
@@ -9,16 +9,26 @@ import logging
 import fnmatch
 import voluptuous as vol
 from typing import Type, Tuple, Optional, Callable, Set
-from functools import wraps
+from functools import lru_cache, wraps
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import Entity
 from homeassistant.util import language as language_util
 from homeassistant.util.dt import DEFAULT_TIME_ZONE, get_time_zone
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
 import homeassistant.helpers.config_validation as cv
+from cryptography.hazmat.primitives.ciphers import Cipher
 
-from .const import DOMAIN, DEVICE_CUSTOMIZES, DATA_CUSTOMIZE
-from .translation_languages import TRANSLATION_LANGUAGES
+try:
+    # cryptography 43+
+    from cryptography.hazmat.decrepit.ciphers.algorithms import ARC4
+except (ModuleNotFoundError, ImportError):
+    try:
+        from cryptography.hazmat.primitives.ciphers.algorithms import ARC4
+    except (ModuleNotFoundError, ImportError):
+        ARC4 = None
+
+from .const import DOMAIN, DEVICE_CUSTOMIZES, DATA_CUSTOMIZE, TRANSLATION_LANGUAGES
 
 
 def get_value(obj, key, def_value=None, sep='.'):
@@ -37,15 +47,37 @@ def get_value(obj, key, def_value=None, sep='.'):
     return result
 
 
+# merged customizes by model or by tuple of customize keys
+_CUSTOMIZES_CACHE: dict[str | tuple, dict] = {}
+
+
+def clear_customizes_cache():
+    """Call after `DEVICE_CUSTOMIZES` or the customizing options changed."""
+    _CUSTOMIZES_CACHE.clear()
+
+
+def _customize_via_model(model) -> dict:
+    if (cfg := _CUSTOMIZES_CACHE.get(model)) is None:
+        cfg = {}
+        for m in wildcard_models(model):
+            if cus := DEVICE_CUSTOMIZES.get(m):
+                cfg = {**cus, **cfg}
+        _CUSTOMIZES_CACHE[model] = cfg
+    return cfg
+
+
+def _customize_via_models(models: tuple) -> dict:
+    if (cfg := _CUSTOMIZES_CACHE.get(models)) is None:
+        cfg = {}
+        for mod in models:
+            cfg = {**_customize_via_model(mod), **cfg}
+        _CUSTOMIZES_CACHE[models] = cfg
+    return cfg
+
+
 def get_customize_via_model(model, key=None, default=None):
-    cfg = {}
-    for m in wildcard_models(model):
-        cus = DEVICE_CUSTOMIZES.get(m) or {}
-        if key is not None and key not in cus:
-            continue
-        if cus:
-            cfg = {**cus, **cfg}
-    return cfg if key is None else cfg.get(key, default)
+    cfg = _customize_via_model(model)
+    return {**cfg} if key is None else cfg.get(key, default)
 
 
 def get_customize_via_entity(entity, key=None, default=None):
@@ -66,10 +98,10 @@ def get_customize_via_entity(entity, key=None, default=None):
         if hasattr(entity, 'customize_keys'):
             mls.extend(entity.customize_keys)
         mls.append(model)
-    for mod in mls:
-        cus = get_customize_via_model(mod)
-        cfg = {**cus, **cfg}
-    return cfg if key is None else cfg.get(key, default)
+    cus = _customize_via_models(tuple(mls))
+    if key is not None:
+        return cus.get(key, default)
+    return {**cus, **cfg}
 
 
 class CustomConfigHelper:
@@ -124,6 +156,49 @@ class CustomConfigHelper:
         return default
 
 
+class SharedStore:
+    """Data of all devices saved in one file, loaded once per hass and saved lazily."""
+    data_key: str = None
+    filename: str = None
+    save_delay = 60
+
+    def __init__(self, hass: HomeAssistant):
+        self.store = Store(hass, 1, f'{DOMAIN}/{self.filename}')
+        self.data: dict = {}
+        self.loaded = False
+        self.lock = asyncio.Lock()
+
+    @classmethod
+    async def async_get(cls, hass: HomeAssistant):
+        this = hass.data[DOMAIN].get(cls.data_key)
+        if not this:
+            this = cls(hass)
+            hass.data[DOMAIN][cls.data_key] = this
+        await this.async_load()
+        return this
+
+    async def async_load(self):
+        async with self.lock:
+            if self.loaded:
+                return
+            try:
+                self.data = await self.store.async_load() or {}
+            except ValueError:
+                await self.store.async_remove()
+                self.data = {}
+            self.loaded = True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+        self.async_delay_save()
+
+    def async_delay_save(self):
+        self.store.async_delay_save(lambda: self.data, self.save_delay)
+
+
 def get_manifest(field=None, default=None):
     manifest = {}
     with open(f'{os.path.dirname(__file__)}/../manifest.json') as fil:
@@ -159,15 +234,20 @@ def in_china(hass=None):
 def wildcard_models(model):
     if not model:
         return []
+    return list(_wildcard_models(model))
+
+
+@lru_cache(maxsize=4096)
+def _wildcard_models(model: str):
     if ':' in model:
-        return [model]
+        return (model,)
     wil = re.sub(r'\.[^.]+$', '.*', model)
-    return [
+    return (
         model,
         wil,
         re.sub(r'^[^.]+\.', '*.', wil),
         '*',
-    ]
+    )
 
 
 def convert_globs_to_pattern(globs: list[str] | None):
@@ -328,42 +408,82 @@ async def async_analytics_track_event(hass: HomeAssistant, event, action, label,
 
 
 class RC4:
+    """RC4 stream cipher.
+
+    Uses the native ARC4 from cryptography when it is available, the pure
+    python implementation is only a fallback.
+    """
     _idx = 0
     _jdx = 0
-    _ksa: list
+    _ksa: list = None
+    _key: bytes = None
+    _native = None
+    _fresh = True
 
     def __init__(self, pwd):
         self.init_key(pwd)
 
     def init_key(self, pwd):
-        cnt = len(pwd)
-        ksa = list(range(256))
-        j = 0
-        for i in range(256):
-            j = (j + ksa[i] + pwd[i % cnt]) & 255
-            ksa[i], ksa[j] = ksa[j], ksa[i]
-        self._ksa = ksa
+        self._key = bytes(pwd)
+        if ARC4:
+            self._native = Cipher(ARC4(self._key), mode=None).encryptor()
+            return self
+        self._ksa = list(rc4_ksa(self._key))
         self._idx = 0
         self._jdx = 0
+        self._fresh = True
         return self
 
     def crypt(self, data):
         if isinstance(data, str):
             data = data.encode()
+        if self._native:
+            return bytearray(self._native.update(data))
         ksa = self._ksa
         i = self._idx
         j = self._jdx
-        out = []
-        for byt in data:
+        stream = bytearray(len(data))
+        for n in range(len(data)):
             i = (i + 1) & 255
             j = (j + ksa[i]) & 255
             ksa[i], ksa[j] = ksa[j], ksa[i]
-            out.append(byt ^ ksa[(ksa[i] + ksa[j]) & 255])
+            stream[n] = ksa[(ksa[i] + ksa[j]) & 255]
         self._idx = i
         self._jdx = j
-        self._ksa = ksa
-        return bytearray(out)
+        self._fresh = False
+        return bytearray(
+            (int.from_bytes(data, 'big') ^ int.from_bytes(stream, 'big')).to_bytes(len(data), 'big')
+        )
 
     def init1024(self):
-        self.crypt(bytes(1024))
+        if self._native:
+            self._native.update(bytes(1024))
+        elif not self._fresh:
+            # i and j wrap around, only a fresh key may use the cached state
+            self.crypt(bytes(1024))
+        else:
+            # state after dropping the first 1024 bytes is computed once per key
+            ksa, self._idx, self._jdx = rc4_drop1024(self._key)
+            self._ksa = list(ksa)
+            self._fresh = False
         return self
+
+
+@lru_cache(maxsize=64)
+def rc4_ksa(key: bytes):
+    cnt = len(key)
+    ksa = list(range(256))
+    j = 0
+    for i in range(256):
+        j = (j + ksa[i] + key[i % cnt]) & 255
+        ksa[i], ksa[j] = ksa[j], ksa[i]
+    return tuple(ksa)
+
+
+@lru_cache(maxsize=64)
+def rc4_drop1024(key: bytes):
+    rc4 = RC4.__new__(RC4)
+    rc4._key = key
+    rc4._ksa = list(rc4_ksa(key))
+    rc4.crypt(bytes(1024))
+    return tuple(rc4._ksa), rc4._idx, rc4._jdx
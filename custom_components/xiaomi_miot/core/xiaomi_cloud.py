@@ -24,7 +24,8 @@ from homeassistant.helpers.aiohttp_client import async_create_clientsession
 from homeassistant.components import persistent_notification
 
 from .const import DOMAIN, CONF_XIAOMI_CLOUD
-from .utils import RC4, aiohttp_retry, local_zone, logger_filter
+from .coordinator import PollScheduler
+from .utils import RC4, SharedStore, aiohttp_retry, local_zone, logger_filter
 from micloud import miutils
 from micloud.micloudexception import MiCloudException
 
@@ -39,6 +40,8 @@ _LOGGER.addFilter(logger_filter)
 
 ACCOUNT_BASE = 'https://account.xiaomi.com'
 UA = "Android-7.1.1-1.0.0-ONEPLUS A3010-136-%s APP/xiaomi.smarthome APPV/62830"
+# responses larger than this are decrypted in the executor
+RC4_EXECUTOR_SIZE = 64 * 1024
 
 
 class MiotCloud(micloud.MiCloud):
@@ -50,6 +53,12 @@ class MiotCloud(micloud.MiCloud):
     failed_logins = 0
     session = None
     async_session: Optional[aiohttp.ClientSession] = None
+    batch_window = 0.3
+    batch_max_props = 100
+    devices_ttl = 86400
+    history_limit = 4
+    # devices and cloud report late, recent buckets are re-requested until this old
+    statistics_grace = 86400 * 2
 
     def __init__(self, hass, username, password, country=None, sid=None):
         try:
@@ -73,6 +82,8 @@ class MiotCloud(micloud.MiCloud):
         self.login_times = 0
         self.cookies = {}
         self.attrs = {}
+        self._props_batch: list[tuple[list, asyncio.Future]] = []
+        self._props_batch_timer: Optional[asyncio.TimerHandle] = None
 
     @property
     def unique_id(self):
@@ -89,7 +100,7 @@ class MiotCloud(micloud.MiCloud):
             p = v.get('piid')
             pms.append({'did': str(did), 'siid': s, 'piid': p})
             rmp[f'prop.{s}.{p}'] = k
-        rls = await self.async_get_props(pms)
+        rls = await self.async_get_props_batched(pms)
         if not rls:
             return None
         dls = []
@@ -106,6 +117,66 @@ class MiotCloud(micloud.MiCloud):
     async def async_get_props(self, params=None):
         return await self.async_request_miot_spec('prop/get', params)
 
+    async def async_get_props_batched(self, params: list):
+        """Get properties together with the requests of other devices that
+        arrive within `batch_window` seconds, and return only the results
+        for `params`.
+        """
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._props_batch.append((params, fut))
+        if sum(len(p) for p, _ in self._props_batch) >= self.batch_max_props:
+            self._flush_props_batch()
+        elif not self._props_batch_timer:
+            self._props_batch_timer = loop.call_later(self.batch_window, self._flush_props_batch)
+        return await fut
+
+    def _flush_props_batch(self):
+        if self._props_batch_timer:
+            self._props_batch_timer.cancel()
+            self._props_batch_timer = None
+        queue = self._props_batch
+        self._props_batch = []
+        batch = []
+        size = 0
+        for req in queue:
+            if batch and size + len(req[0]) > self.batch_max_props:
+                self.hass.async_create_task(self._async_request_props_batch(batch))
+                batch = []
+                size = 0
+            batch.append(req)
+            size += len(req[0])
+        if batch:
+            self.hass.async_create_task(self._async_request_props_batch(batch))
+
+    async def _async_request_props_batch(self, batch: list):
+        params = [p for pms, _ in batch for p in pms]
+        try:
+            async with PollScheduler.from_hass(self.hass).slot('cloud'):
+                rls = await self.async_get_props(params)
+        except Exception as exc:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        results = {}
+        for v in rls or []:
+            if isinstance(v, dict):
+                results[(str(v.get('did')), v.get('siid'), v.get('piid'))] = v
+        if len(batch) > 1:
+            _LOGGER.debug('Got %s properties for %s requests in one batch', len(params), len(batch))
+        for pms, fut in batch:
+            if fut.done():
+                continue
+            if not rls:
+                fut.set_result(rls)
+                continue
+            fut.set_result([
+                r
+                for p in pms
+                if (r := results.get((str(p.get('did')), p.get('siid'), p.get('piid'))))
+            ])
+
     @aiohttp_retry(3, logger=_LOGGER)
     async def async_set_props(self, params=None):
         return await self.async_request_miot_spec('prop/set', params, timeout=5, raise_timeout=True)
@@ -161,6 +232,64 @@ class MiotCloud(micloud.MiCloud):
             vls = [val]
         return vls.pop(0)
 
+    def history_semaphore(self) -> asyncio.Semaphore:
+        """Limit the statistics/records requests in flight of the account."""
+        sems = self.hass.data[DOMAIN].setdefault('history_semaphores', {})
+        if not (sem := sems.get(self.unique_id)):
+            sem = sems[self.unique_id] = asyncio.Semaphore(self.history_limit)
+        return sem
+
+    async def async_get_statistics(self, params: dict):
+        """Request v2/user/statistics, the final buckets of daily statistics are served from the local cache."""
+        if 'day' not in f"{params.get('data_type')}":
+            async with self.history_semaphore():
+                return await self.async_request_api('v2/user/statistics', params) or {}
+
+        store = await StatisticsStore.async_get(self.hass)
+        key = '{did}-{key}-{data_type}'.format(**params)
+        cached = store.get(key)
+        pms = params
+        if cached and cached['since'] <= params['time_start'] and cached['last']:
+            # only the recent buckets, late reports may still change them
+            pms = {
+                **params,
+                'time_start': max(params['time_start'], cached['last'] + 1),
+            }
+        async with self.history_semaphore():
+            rdt = await self.async_request_api('v2/user/statistics', pms) or {}
+        result = rdt.get('result')
+        if not isinstance(result, list):
+            return rdt
+
+        fresh = {}
+        for v in result:
+            if isinstance(v, dict) and 'time' in v:
+                fresh[int(v['time'])] = v
+        if pms is params or not cached:
+            cached = {'since': params['time_start'], 'last': 0, 'items': {}}
+        items = {
+            t: v
+            for t, v in cached['items'].items()
+            if t >= params['time_start']
+        }
+        items.update(fresh)
+        if not items:
+            return rdt
+
+        # the newest bucket is still open, and late reports may still change the recent ones
+        final = min(max(items), int(time.time()) - self.statistics_grace)
+        closed = {t: v for t, v in items.items() if t < final}
+        store.set(key, {
+            'since': max(cached['since'], params['time_start']),
+            'last': max(closed) if closed else 0,
+            'items': closed,
+        })
+
+        # newest first like the api, the latest `limit` buckets
+        limit = int(params.get('limit') or 1)
+        merged = [items[t] for t in sorted(items, reverse=True)[:limit]]
+        return {**rdt, 'result': merged}
+
     async def async_check_auth(self, notify=False):
         if self.service_token:
             api = 'v2/message/v2/check_new_msg'
@@ -270,14 +399,11 @@ class MiotCloud(micloud.MiCloud):
         return rdt
 
     async def async_get_device(self, mac=None, host=None):
-        dvs = await self.async_get_devices() or []
-        for d in dvs:
-            if not isinstance(d, dict):
-                continue
-            if mac and mac == d.get('mac'):
-                return d
-            if host and host == d.get('localip'):
-                return d
+        directory = await self.async_get_directory()
+        if mac and (d := directory.find('mac', mac)):
+            return d
+        if host and (d := directory.find('localip', host)):
+            return d
         return None
 
     async def get_device_list(self):
@@ -293,38 +419,46 @@ class MiotCloud(micloud.MiCloud):
         _LOGGER.warning('Got xiaomi devices for %s failed: %s', self.username, rdt)
         return None
 
-    async def get_all_devices(self, homes=None):
-        devices = {
+    async def get_all_devices(self, homes=None, devices=None):
+        if devices is None:
+            devices = await self.get_device_list()
+        if not isinstance(homes, list):
+            return devices or []
+        dls = {
             d['did']: d
-            for d in await self.get_device_list() or []
+            for d in devices or []
         }
-        if not isinstance(homes, list):
-            return await self.get_device_list() or []
-        for home in homes:
-            hid = int(home.get('id', 0))
-            uid = int(home.get('uid', 0))
-            start_did = ''
-            has_more = True
-            while has_more:
-                rdt = await self.async_request_api('v2/home/home_device_list', {
-                    'home_owner': uid,
-                    'home_id': hid,
-                    'limit': 300,
-                    'start_did': start_did,
-                    'get_split_device': False,
-                    'support_smart_home': True,
-                    'get_cariot_device': True,
-                    'get_third_device': True,
-                }, debug=False, timeout=20) or {}
-                result = rdt.get('result') or {}
-                if not result:
-                    _LOGGER.warning('Got xiaomi devices for %s failed: %s', self.username, rdt)
-                for d in result.get('device_info') or []:
-                    did = d.get('did')
-                    devices.setdefault(did, {}).update(d)
-                start_did = result.get('max_did') or ''
-                has_more = result.get('has_more') and start_did
-        return list(devices.values())
+        # homes are fetched concurrently and merged in their order
+        for lst in await asyncio.gather(*[self.get_home_device_list(home) for home in homes]):
+            for d in lst:
+                did = d.get('did')
+                dls.setdefault(did, {}).update(d)
+        return list(dls.values())
+
+    async def get_home_device_list(self, home: dict):
+        hid = int(home.get('id', 0))
+        uid = int(home.get('uid', 0))
+        dls = []
+        start_did = ''
+        has_more = True
+        while has_more:
+            rdt = await self.async_request_api('v2/home/home_device_list', {
+                'home_owner': uid,
+                'home_id': hid,
+                'limit': 300,
+                'start_did': start_did,
+                'get_split_device': False,
+                'support_smart_home': True,
+                'get_cariot_device': True,
+                'get_third_device': True,
+            }, debug=False, timeout=20) or {}
+            result = rdt.get('result') or {}
+            if not result:
+                _LOGGER.warning('Got xiaomi devices for %s failed: %s', self.username, rdt)
+            dls.extend(result.get('device_info') or [])
+            start_did = result.get('max_did') or ''
+            has_more = result.get('has_more') and start_did
+        return dls
 
     async def get_home_devices(self):
         rdt = await self.async_request_api('v2/homeroom/gethome_merged', {
@@ -351,83 +485,122 @@ class MiotCloud(micloud.MiCloud):
                     }
         return result
 
+    @property
+    def devices_file(self):
+        return f'xiaomi_miot/devices-{self.user_id}-{self.default_server}.json'
+
+    def devices_cache(self) -> dict:
+        """Device list of the account in memory, shared by all cloud instances of it."""
+        caches = self.hass.data[DOMAIN].setdefault('devices_cache', {})
+        return caches.setdefault(self.devices_file, {})
+
     async def async_get_devices(self, renew=False, return_all=False):
         if not self.user_id:
             return None
-        fnm = f'xiaomi_miot/devices-{self.user_id}-{self.default_server}.json'
-        store = Store(self.hass, 1, fnm)
-        now = time.time()
-        cds = []
-        dvs = []
-        try:
-            dat = await store.async_load() or {}
-        except ValueError:
-            await store.async_remove()
-            dat = {}
-        if isinstance(dat, dict):
-            cds = dat.get('devices') or []
-            if not renew and dat.get('update_time', 0) > (now - 86400):
-                dvs = cds
-        if not dvs:
+        cache = self.devices_cache()
+        if 'data' not in cache:
+            store = Store(self.hass, 1, self.devices_file)
             try:
-                hls = await self.get_home_devices()
-                dvs = await self.get_all_devices(hls.get('homelist', []))
-                if dvs:
-                    if hls:
-                        hds = hls.get('devices') or {}
-                        dvs = [
-                            {**d, **(hds.get(d.get('did')) or {})}
-                            for d in dvs
-                        ]
-                    dat = {
-                        'update_time': now,
-                        'devices': dvs,
-                        'homes': hls.get('homelist', []),
-                    }
-                    await store.async_save(dat)
-                    _LOGGER.info('Got %s devices from xiaomi cloud', len(dvs))
-            except requests.exceptions.ConnectionError as exc:
-                if not cds:
-                    raise exc
-                dvs = cds
-                _LOGGER.warning('Get xiaomi devices filed: %s, use cached %s devices.', exc, len(cds))
+                dat = await store.async_load() or {}
+            except ValueError:
+                await store.async_remove()
+                dat = {}
+            cache.setdefault('data', dat if isinstance(dat, dict) else {})
+        dat = cache['data']
+        if renew or not dat.get('devices'):
+            dat = await self.async_refresh_devices()
+        elif dat.get('update_time', 0) <= time.time() - self.devices_ttl:
+            # serve the cached list, and renew it in background
+            self.async_refresh_devices(background=True)
         if return_all:
             return dat
-        return dvs
+        return dat.get('devices') or []
+
+    def async_refresh_devices(self, background=False):
+        """Fetch the device list from cloud, concurrent callers share one request."""
+        cache = self.devices_cache()
+        task = cache.get('task')
+        if not task or task.done():
+            task = self.hass.async_create_task(self._async_refresh_devices())
+            task.add_done_callback(self._on_devices_refreshed)
+            cache['task'] = task
+        if background:
+            return task
+        return asyncio.shield(task)
+
+    @staticmethod
+    def _on_devices_refreshed(task: asyncio.Task):
+        if not task.cancelled() and (exc := task.exception()):
+            _LOGGER.warning('Refresh xiaomi devices failed: %s', exc)
+
+    async def _async_refresh_devices(self):
+        now = time.time()
+        cache = self.devices_cache()
+        old = cache.get('data') or {}
+        cds = old.get('devices') or []
+        try:
+            hls, dls = await asyncio.gather(self.get_home_devices(), self.get_device_list())
+            dvs = await self.get_all_devices(hls.get('homelist', []), devices=dls)
+        except requests.exceptions.ConnectionError as exc:
+            if not cds:
+                raise exc
+            _LOGGER.warning('Get xiaomi devices filed: %s, use cached %s devices.', exc, len(cds))
+            return old
+        if not dvs:
+            return old
+        hds = hls.get('devices') or {}
+        dvs = [
+            {**d, **(hds.get(d.get('did')) or {})}
+            for d in dvs
+        ]
+        dat = {
+            'update_time': now,
+            'devices': dvs,
+            'homes': hls.get('homelist', []),
+        }
+        cache['data'] = dat
+        cache.pop('directory', None)
+        added, removed, changed = self.diff_devices(cds, dvs)
+        store = Store(self.hass, 1, self.devices_file)
+        if added or removed or changed or dat['homes'] != old.get('homes'):
+            await store.async_save(dat)
+            _LOGGER.info(
+                'Got %s devices from xiaomi cloud, added: %s, removed: %s, changed: %s',
+                len(dvs), added, removed, len(changed),
+            )
+        elif old.get('update_time', 0) <= now - self.devices_ttl / 2:
+            # unchanged, only keep the saved time from expiring
+            await store.async_save(dat)
+        else:
+            _LOGGER.debug('Xiaomi devices of %s not changed', self.username)
+        return dat
+
+    @staticmethod
+    def diff_devices(old: list, new: list):
+        """Dids added, removed and changed between two device lists."""
+        ods = {d.get('did'): d for d in old if isinstance(d, dict)}
+        nds = {d.get('did'): d for d in new if isinstance(d, dict)}
+        added = [k for k in nds if k not in ods]
+        removed = [k for k in ods if k not in nds]
+        changed = [k for k, d in nds.items() if k in ods and ods[k] != d]
+        return added, removed, changed
 
     async def async_renew_devices(self):
         return await self.async_get_devices(renew=True)
 
+    async def async_get_directory(self, renew=False) -> 'DeviceDirectory':
+        """Indexed device list of the account, rebuilt only when the list is renewed."""
+        await self.async_get_devices(renew=renew)
+        cache = self.devices_cache()
+        data = cache.get('data') or {}
+        directory = cache.get('directory')
+        if not directory or directory.data is not data:
+            directory = cache['directory'] = DeviceDirectory(data)
+        return directory
+
     async def async_get_devices_by_key(self, key, renew=False, filters=None):
-        dat = {}
-        if filters is None:
-            filters = {}
-        fls = ['ssid', 'bssid', 'home_id', 'model', 'did']
-        dvs = await self.async_get_devices(renew=renew) or []
-        for d in dvs:
-            if not isinstance(d, dict):
-                continue
-            if self.is_hide(d):
-                continue
-            if not d.get('mac'):
-                d['mac'] = d.get('did')
-            k = d.get(key)
-            for f in fls:
-                ft = filters.get(f'filter_{f}')
-                if not ft:
-                    continue
-                ex = ft != 'include'
-                fl = filters.get(f'{f}_list') or {}
-                fv = d.get(f)
-                if ex:
-                    ok = fv not in fl
-                else:
-                    ok = fv in fl
-                if not ok:
-                    k = None
-            if k:
-                dat[k] = d
-        return dat
+        directory = await self.async_get_directory(renew=renew)
+        return directory.by_key(key, filters)
 
     async def async_get_homerooms(self, renew=False):
         dat = await self.async_get_devices(renew=renew, return_all=True) or {}
@@ -851,7 +1024,10 @@ class MiotCloud(micloud.MiCloud):
         elif 'message' not in rsp:
             try:
                 signed_nonce = self.signed_nonce(params['_nonce'])
-                rsp = MiotCloud.decrypt_data(signed_nonce, rsp)
+                if len(rsp) > RC4_EXECUTOR_SIZE:
+                    rsp = await self.hass.async_add_executor_job(MiotCloud.decrypt_data, signed_nonce, rsp)
+                else:
+                    rsp = MiotCloud.decrypt_data(signed_nonce, rsp)
             except ValueError:
                 _LOGGER.warning('Error while decrypting response of request to %s :%s', url, rsp)
         return rsp
@@ -952,3 +1128,123 @@ class MiCloudNeedVerify(MiCloudException):
     def with_url(self, url):
         self.url = url
         return self
+
+
+
+class DeviceDirectory:
+    """Visible devices of a cloud account, indexed by the keys used for lookups and filters.
+
+    Hidden sub devices are only listed as children of their parent, and found by `find`.
+    """
+    unique_keys = ('did', 'mac', 'localip')
+    group_keys = ('model', 'home_id', 'ssid', 'bssid', 'parent_id')
+    lookup_keys = ('mac', 'localip')
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.devices = []
+        self.indexes: dict[str, dict] = {k: {} for k in self.unique_keys}
+        self.groups: dict[str, dict] = {k: {} for k in self.group_keys}
+        self.lookups: dict[str, dict] = {k: {} for k in self.lookup_keys}
+        for d in data.get('devices') or []:
+            if not isinstance(d, dict):
+                continue
+            for k in self.lookup_keys:
+                if v := d.get(k):
+                    # the first one wins, like scanning the list
+                    self.lookups[k].setdefault(v, d)
+            if MiotCloud.is_hide(d):
+                # still a child of its parent
+                self.groups['parent_id'].setdefault(d.get('parent_id'), []).append(d)
+                continue
+            if not d.get('mac'):
+                # the saved list is kept as fetched
+                d = {**d, 'mac': d.get('did')}
+            self.devices.append(d)
+            for k in self.unique_keys:
+                if v := d.get(k):
+                    self.indexes[k][v] = d
+            for k in self.group_keys:
+                self.groups[k].setdefault(d.get(k), []).append(d)
+
+    def __len__(self):
+        return len(self.devices)
+
+    def get(self, key, value):
+        return self.indexes[key].get(value)
+
+    def find(self, key, value):
+        """Any device with this mac or localip of its own, hidden ones included."""
+        return self.lookups[key].get(value)
+
+    def group(self, key, value) -> list:
+        return [*(self.groups[key].get(value) or [])]
+
+    def index(self, key) -> dict:
+        if key in self.indexes:
+            return {**self.indexes[key]}
+        if key in self.groups:
+            return {
+                k: lst[-1]
+                for k, lst in self.groups[key].items()
+                if k and lst
+            }
+        return self.by_key(key)
+
+    def by_key(self, key, filters=None) -> dict:
+        """Devices by the key, the last one wins like a dict built from the list."""
+        fls = ['ssid', 'bssid', 'home_id', 'model', 'did']
+        ids = None
+        for f in fls:
+            ft = (filters or {}).get(f'filter_{f}')
+            if not ft:
+                continue
+            fl = (filters or {}).get(f'{f}_list') or {}
+            sel = {
+                id(d)
+                for v in fl
+                for d in (self.group(f, v) if f in self.groups else [self.get(f, v)])
+                if d
+            }
+            if ft == 'include':
+                ids = sel if ids is None else ids & sel
+            else:
+                ids = ({id(d) for d in self.devices} if ids is None else ids) - sel
+        if ids is None and key in self.indexes:
+            return {**self.indexes[key]}
+        dat = {}
+        for d in self.devices:
+            if ids is not None and id(d) not in ids:
+                continue
+            if k := d.get(key):
+                dat[k] = d
+        return dat
+
+
+class StatisticsStore(SharedStore):
+    """Closed buckets of the daily statistics of all devices, saved in one file."""
+    data_key = 'cloud_statistics'
+    filename = 'cloud-statistics.json'
+
+    def get(self, key):
+        dat = self.data.get(key)
+        if not isinstance(dat, dict):
+            return None
+        return {
+            'since': dat.get('since') or 0,
+            'last': dat.get('last') or 0,
+            'items': {
+                int(v['time']): v
+                for v in dat.get('items') or []
+            },
+        }
+
+    def set(self, key, dat: dict):
+        old = self.data.get(key) or {}
+        new = {
+            **dat,
+            'items': [dat['items'][t] for t in sorted(dat['items'])],
+        }
+        self.data[key] = new
+        if old.get('last') != new['last'] or old.get('since') != new['since']:
+            self.async_delay_save()
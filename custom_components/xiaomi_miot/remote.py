@@ -97,10 +97,8 @@ class MiotRemoteEntity(MiotEntity, RemoteEntity):
             rdt = await mic.async_request_api('v2/irdevice/controllers', {'parent_id': did}) or {}
             rds = (rdt.get('result') or {}).get('controllers') or []
             if not rdt:
-                dls = await mic.async_get_devices() or []
-                for d in dls:
-                    if did == d.get('parent_id'):
-                        rds.append(d)
+                directory = await mic.async_get_directory()
+                rds.extend(directory.group('parent_id', did))
             for d in rds:
                 ird = d.get('did')
                 rdt = await mic.async_request_api('v2/irdevice/controller/keys', {'did': ird}) or {}
@@ -2,8 +2,10 @@
 from homeassistant.components import system_health
 from homeassistant.core import HomeAssistant, callback
 
+from .core.const import DOMAIN
 from .core.utils import async_get_manifest
 from .core.xiaomi_cloud import MiotCloud
+from .core.hass_entry import HassEntry
 
 
 @callback
@@ -20,7 +22,7 @@ async def system_health_info(hass):
     all_devices = {}
     for mic in MiotCloud.all_clouds(hass):
         uas[mic.user_id] = mic
-        uds[mic.unique_id] = await mic.async_get_devices_by_key('did') or {}
+        uds[mic.unique_id] = (await mic.async_get_directory()).index('did')
         all_devices.update(uds[mic.unique_id])
 
     api = mic.get_api_url('') if mic else 'https://api.io.mi.com'
@@ -36,5 +38,19 @@ async def system_health_info(hass):
         'logged_accounts': len(uas),
         'total_devices': len(all_devices),
     }
+    if scheduler := hass.data.get(DOMAIN, {}).get('poll_scheduler'):
+        for k, v in scheduler.metrics().items():
+            data[f'polling_{k}'] = (
+                f"{v['in_flight']}/{v['limit']} in flight, {v['queued']} queued (max {v['max_queued']}), "
+                f"late {v['lateness']}s (max {v['max_lateness']}s), {v['polls']} polls"
+            )
+
+    writes = skipped = 0
+    for entry in HassEntry.ALL.values():
+        for device in entry.devices.values():
+            for entity in device.entities.values():
+                writes += getattr(entity, 'state_writes', 0)
+                skipped += getattr(entity, 'skipped_writes', 0)
+    data['state_writes'] = f'{writes} written, {skipped} skipped as unchanged'
 
     return data
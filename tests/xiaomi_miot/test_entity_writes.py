@@ -0,0 +1,102 @@
+"""State writes of XEntity, skipped when the rendered state did not change."""
+import pytest
+from homeassistant.helpers.entity_values import EntityValues
+from pytest_homeassistant_custom_component.common import MockConfigEntry, MockEntityPlatform
+
+from custom_components.xiaomi_miot.core import hass_entity
+from custom_components.xiaomi_miot.core.const import DOMAIN, DATA_CUSTOMIZE, DEVICE_CUSTOMIZES
+from custom_components.xiaomi_miot.core.converters import BaseConv
+from custom_components.xiaomi_miot.core.device import Device, DeviceInfo
+from custom_components.xiaomi_miot.core.hass_entity import XEntity
+from custom_components.xiaomi_miot.core.hass_entry import HassEntry
+from custom_components.xiaomi_miot.core.miot_spec import MiotSpec
+from custom_components.xiaomi_miot.core.utils import clear_customizes_cache
+
+URN = 'urn:miot-spec-v2:device:camera:0000A01C:test-cam:1'
+
+
+class MotionEntity(XEntity):
+    """Like the camera, the state is read from device data outside of the update."""
+
+    def set_state(self, data: dict):
+        self._attr_state = self.device.data.get('motion_video_latest')
+
+
+@pytest.fixture
+def device(hass):
+    hass.data.setdefault(DOMAIN, {}).update({'config': {}, 'entities': {}})
+    hass.data.setdefault(DATA_CUSTOMIZE, EntityValues())
+    config = MockConfigEntry(domain=DOMAIN, data={})
+    config.add_to_hass(hass)
+    entry = HassEntry.init(hass, config)
+    device = Device(DeviceInfo({'did': '1', 'model': 'test.camera.v1', 'mac': '11:22:33:44:55:66'}), entry)
+    device.spec = MiotSpec(hass, {'type': URN, 'services': []})
+    yield device
+    HassEntry.ALL.clear()
+    clear_customizes_cache()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(hass_entity.time, 'monotonic', lambda: now[0])
+    return now
+
+
+async def add_entity(hass, entity):
+    platform = MockEntityPlatform(hass, domain='sensor', platform_name=DOMAIN)
+    await platform.async_add_entities([entity])
+    return entity
+
+
+async def test_skip_unchanged_state(hass, device, clock):
+    entity = await add_entity(hass, XEntity(device, BaseConv('motion', 'sensor')))
+    entity.on_device_update({'sensor.motion': 'idle'})
+    assert hass.states.get(entity.entity_id).state == 'idle'
+    entity.on_device_update({'sensor.motion': 'idle'})
+    assert (entity.state_writes, entity.skipped_writes) == (1, 1)
+
+    entity.on_device_update({'sensor.motion': 'detected'})
+    assert hass.states.get(entity.entity_id).state == 'detected'
+    assert (entity.state_writes, entity.skipped_writes) == (2, 1)
+
+
+async def test_write_state_set_from_device_data(hass, device, clock):
+    entity = await add_entity(hass, MotionEntity(device, BaseConv('motion', 'sensor')))
+    device.data['motion_video_latest'] = 'a.mp4'
+    entity.on_device_update({'sensor.motion': 1})
+    # same update, but set_state renders a new state
+    device.data['motion_video_latest'] = 'b.mp4'
+    entity.on_device_update({'sensor.motion': 1})
+    assert hass.states.get(entity.entity_id).state == 'b.mp4'
+    assert (entity.state_writes, entity.skipped_writes) == (2, 0)
+
+
+async def test_write_changed_attributes(hass, device, clock):
+    conv = BaseConv('motion', 'sensor')
+    device.add_converter(conv)
+    entity = await add_entity(hass, XEntity(device, conv))
+    device.props['motion'] = 1
+    entity.on_device_update({'sensor.motion': 'idle'})
+    device.props['motion'] = 2
+    entity.on_device_update({'sensor.motion': 'idle'})
+    assert hass.states.get(entity.entity_id).attributes['motion'] == 2
+    assert (entity.state_writes, entity.skipped_writes) == (2, 0)
+
+
+async def test_state_heartbeat(hass, device, clock, monkeypatch):
+    monkeypatch.setitem(DEVICE_CUSTOMIZES, 'test.camera.v1', {'state_heartbeat': 60})
+    clear_customizes_cache()
+    entity = await add_entity(hass, XEntity(device, BaseConv('motion', 'sensor')))
+    entity.on_device_update({'sensor.motion': 'idle'})
+    clock[0] += 59
+    entity.on_device_update({'sensor.motion': 'idle'})
+    assert (entity.state_writes, entity.skipped_writes) == (1, 1)
+
+    clock[0] += 1
+    entity.on_device_update({'sensor.motion': 'idle'})
+    assert (entity.state_writes, entity.skipped_writes) == (2, 1)
+    # the heartbeat counts from the last write
+    clock[0] += 30
+    entity.on_device_update({'sensor.motion': 'idle'})
+    assert (entity.state_writes, entity.skipped_writes) == (2, 2)
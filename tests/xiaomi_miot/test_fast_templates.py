@@ -0,0 +1,36 @@
+"""Simple templates rendered without jinja give the same results as jinja."""
+import pytest
+
+from custom_components.xiaomi_miot.core.templates import fast_template, render_template, template
+
+CASES = [
+    ('{{ value == 1 }}', [1, 2, '1']),
+    ('{{ value != "on" }}', ['on', 'off']),
+    ('{{ value in [1, 2] }}', [1, 3, '1']),
+    ('{{ value not in ["a", "b"] }}', ['a', 'c', 'ab']),
+    ('{{ not value }}', [0, 1, '', None]),
+    ('{{ value|int + 1 }}', [1, 2.5]),
+    ('{{ value / 10 }}', [15, 0.5]),
+    ('{{ value|default(0, true) / 10 }}', [15, None]),
+]
+
+
+@pytest.mark.parametrize('source, values', CASES)
+async def test_same_as_jinja(hass, source, values):
+    assert fast_template(source)
+    for value in values:
+        expected = template(source, hass).async_render({'value': value})
+        assert render_template(source, hass, {'value': value}) == expected
+
+
+@pytest.mark.parametrize('source', [
+    '{{ value in [a, b] }}',
+    '{{ value in [1, true] }}',
+    '{{ value not in [on, off] }}',
+])
+async def test_not_literal_list_uses_jinja(hass, source):
+    assert fast_template(source) is None
+    # a raw string would make `in` a substring test, 'a' in '[a, b]'
+    variables = {'value': 'a', 'a': 'x', 'b': 'y', 'on': 'o', 'off': 'f'}
+    expected = template(source, hass).async_render(variables)
+    assert render_template(source, hass, variables) == expected
@@ -0,0 +1,53 @@
+"""Slots and first poll phases of the poll scheduler."""
+import asyncio
+
+from custom_components.xiaomi_miot.core.coordinator import PollScheduler
+
+
+class OneSlotScheduler(PollScheduler):
+    limits = {'local': 1, 'cloud': 1}
+
+
+async def test_release_current_before_fallback():
+    scheduler = OneSlotScheduler()
+    entered = asyncio.Event()
+
+    async def poll():
+        async with scheduler.slot('local'):
+            # falls back to cloud, the next local poll must not wait for it
+            PollScheduler.release_current('local')
+            PollScheduler.release_current('local')
+            entered.set()
+            await asyncio.sleep(0.1)
+
+    task = asyncio.create_task(poll())
+    await entered.wait()
+    async with asyncio.timeout(0.05):
+        async with scheduler.slot('local'):
+            assert scheduler.stats['local']['in_flight'] == 1
+    await task
+    assert scheduler.stats['local']['in_flight'] == 0
+    assert not scheduler.semaphores['local'].locked()
+
+
+async def test_release_current_of_other_kind():
+    scheduler = PollScheduler()
+    async with scheduler.slot('cloud') as slot:
+        PollScheduler.release_current('local')
+        assert not slot.released
+    assert slot.released
+    assert scheduler.stats['cloud']['in_flight'] == 0
+    # outside of a poll there is nothing to release
+    PollScheduler.release_current()
+
+
+def test_offset_spread():
+    scheduler = PollScheduler()
+    offsets = [scheduler.offset(f'device-{i}', 60) for i in range(60)]
+    assert scheduler.offset('device-7', 60) == offsets[7]
+    # every 6 second bucket of the interval gets 6 first polls, give or take one
+    buckets = [0] * 10
+    for v in offsets:
+        buckets[int(v // 6)] += 1
+    assert min(buckets) >= 5 and max(buckets) <= 7
+    assert max(scheduler.offset('long', 3600), scheduler.offset('short', 10)) <= scheduler.max_spread
@@ -0,0 +1,83 @@
+"""RC4 native and fallback paths against a plain reference implementation."""
+import os
+
+import pytest
+
+from custom_components.xiaomi_miot.core import utils
+from custom_components.xiaomi_miot.core.utils import RC4
+
+# after 256 bytes both i and j of this key are back at 0
+WRAP_KEY = (261).to_bytes(4, 'big') * 4
+
+
+class ReferenceRC4:
+    def __init__(self, key):
+        ksa = list(range(256))
+        j = 0
+        for i in range(256):
+            j = (j + ksa[i] + key[i % len(key)]) & 255
+            ksa[i], ksa[j] = ksa[j], ksa[i]
+        self.ksa = ksa
+        self.i = 0
+        self.j = 0
+
+    def crypt(self, data):
+        out = bytearray()
+        for b in data:
+            self.i = (self.i + 1) & 255
+            self.j = (self.j + self.ksa[self.i]) & 255
+            self.ksa[self.i], self.ksa[self.j] = self.ksa[self.j], self.ksa[self.i]
+            out.append(b ^ self.ksa[(self.ksa[self.i] + self.ksa[self.j]) & 255])
+        return out
+
+
+@pytest.fixture(params=['native', 'fallback'])
+def mode(request, monkeypatch):
+    if request.param == 'native':
+        if not utils.ARC4:
+            pytest.skip('ARC4 is not available in cryptography')
+    else:
+        monkeypatch.setattr(utils, 'ARC4', None)
+    return request.param
+
+
+def run_steps(cipher, steps):
+    out = []
+    for step in steps:
+        if step == 'init1024':
+            if isinstance(cipher, ReferenceRC4):
+                cipher.crypt(bytes(1024))
+            else:
+                cipher.init1024()
+        else:
+            out.append(bytes(cipher.crypt(step)))
+    return out
+
+
+STEPS = [
+    ['init1024', b'{"id":1}', b'', b'x' * 300, os.urandom(77)],
+    [b'abc', 'init1024', b'plain text', 'init1024', os.urandom(1500)],
+    ['init1024', 'init1024', os.urandom(33)],
+    [os.urandom(5) for _ in range(40)],
+]
+
+
+@pytest.mark.parametrize('steps', STEPS)
+@pytest.mark.parametrize('key', [b'short', os.urandom(16), os.urandom(32), WRAP_KEY])
+def test_streamed_crypt(mode, key, steps):
+    expected = run_steps(ReferenceRC4(key), steps)
+    assert run_steps(RC4(key), steps) == expected
+    # a second cipher with the same key must not see state of the first one
+    assert run_steps(RC4(key), steps) == expected
+
+
+def test_init1024_after_wrap(mode):
+    steps = [os.urandom(256), 'init1024', os.urandom(64)]
+    assert run_steps(RC4(WRAP_KEY), steps) == run_steps(ReferenceRC4(WRAP_KEY), steps)
+
+
+def test_str_and_decrypt(mode):
+    key = os.urandom(16)
+    enc = RC4(key).init1024().crypt('{"cmd":"ping"}')
+    assert isinstance(enc, bytearray)
+    assert RC4(key).init1024().crypt(enc) == b'{"cmd":"ping"}'
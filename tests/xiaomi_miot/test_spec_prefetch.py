@@ -0,0 +1,153 @@
+"""Spec prefetch against a local stand-in for miot-spec.org, no network needed."""
+import asyncio
+import socket
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.xiaomi_miot.core.const import DOMAIN, DEVICE_CUSTOMIZES
+from custom_components.xiaomi_miot.core.device import Device, DeviceInfo
+from custom_components.xiaomi_miot.core.hass_entry import HassEntry
+from custom_components.xiaomi_miot.core.miot_spec import MiotSpec
+from custom_components.xiaomi_miot.core.utils import clear_customizes_cache
+
+URN_A = 'urn:miot-spec-v2:device:outlet:0000A002:test-a:1'
+URN_B = 'urn:miot-spec-v2:device:outlet:0000A002:test-b:1'
+URN_C = 'urn:miot-spec-v2:device:outlet:0000A002:test-c:1'
+URN_D = 'urn:miot-spec-v2:device:outlet:0000A002:test-d:1'
+
+
+def spec_of(urn):
+    return {
+        'type': urn,
+        'description': 'Outlet',
+        'services': [
+            {
+                'iid': 2,
+                'type': 'urn:miot-spec-v2:service:switch:0000780E:test:1',
+                'description': 'Switch',
+                'properties': [
+                    {
+                        'iid': 1,
+                        'type': 'urn:miot-spec-v2:property:on:00000006:test:1',
+                        'description': 'Switch Status',
+                        'format': 'bool',
+                        'access': ['read', 'write', 'notify'],
+                    },
+                ],
+            },
+        ],
+    }
+
+
+def base_url(server: TestServer):
+    return f'http://{server.host}:{server.port}'
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+async def spec_server(socket_enabled):
+    # with `overlap` set, a request waits until that many requests are in flight
+    overlapped = asyncio.Event()
+    stats = {'requests': [], 'in_flight': 0, 'max_in_flight': 0, 'overlap': 0, 'overlapped': overlapped}
+
+    async def instance(request):
+        stats['requests'].append(request.query['type'])
+        stats['in_flight'] += 1
+        stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+        if stats['overlap']:
+            if stats['in_flight'] >= stats['overlap']:
+                overlapped.set()
+            try:
+                await asyncio.wait_for(overlapped.wait(), 2)
+            except asyncio.TimeoutError:
+                pass
+        await asyncio.sleep(0.05)
+        stats['in_flight'] -= 1
+        return web.json_response(spec_of(request.query['type']))
+
+    async def langs(request):
+        return web.json_response({'type': request.query['urn'], 'data': {}})
+
+    app = web.Application()
+    app.router.add_get('/miot-spec-v2/instance', instance)
+    app.router.add_get('/instance/v2/multiLanguage', langs)
+    server = TestServer(app, host='127.0.0.1')
+    await server.start_server()
+    server.stats = stats
+    yield server
+    await server.close()
+
+
+@pytest.fixture
+def hass_entry(hass):
+    hass.data.setdefault(DOMAIN, {})
+
+    def create(**data):
+        config = MockConfigEntry(domain=DOMAIN, data=data)
+        config.add_to_hass(hass)
+        return HassEntry.init(hass, config)
+
+    yield create
+    HassEntry.ALL.clear()
+
+
+async def test_prefetch_downloads_each_type_once(hass, hass_entry, spec_server, monkeypatch):
+    monkeypatch.setattr(MiotSpec, 'SPEC_HOSTS', [base_url(spec_server)])
+    limit = 3
+    spec_server.stats['overlap'] = limit
+    entry = hass_entry()
+    devices = [
+        {'did': '1', 'model': 'test.plug.a', 'urn': URN_A},
+        {'did': '2', 'model': 'test.plug.a', 'urn': URN_A},
+        {'did': '3', 'model': 'test.plug.b', 'urn': URN_B},
+        {'did': '4', 'model': 'test.plug.c', 'urn': URN_C},
+        {'did': '5', 'model': 'test.plug.d', 'urn': URN_D},
+    ]
+    await entry.async_prefetch_specs(devices, limit=limit)
+    assert sorted(spec_server.stats['requests']) == [URN_A, URN_B, URN_C, URN_D]
+    # the limit was reached, but never exceeded
+    assert spec_server.stats['overlapped'].is_set()
+    assert spec_server.stats['max_in_flight'] <= limit
+
+    # the device init reads the prefetched spec
+    device = Device(DeviceInfo(devices[0]), entry)
+    spec = await device.get_spec()
+    assert spec.type == URN_A
+    assert len(spec_server.stats['requests']) == 4
+
+
+async def test_prefetch_falls_back_to_next_host(hass, hass_entry, spec_server, monkeypatch):
+    down = f'http://127.0.0.1:{closed_port()}'
+    monkeypatch.setattr(MiotSpec, 'SPEC_HOSTS', [down, base_url(spec_server)])
+    entry = hass_entry()
+    await entry.async_prefetch_specs([{'did': '1', 'model': 'test.plug.a', 'urn': URN_A}])
+    assert spec_server.stats['requests'] == [URN_A]
+    assert hass.data[DOMAIN]['miot_spec_host'] == base_url(spec_server)
+
+    spec = await MiotSpec.async_from_type(hass, URN_A)
+    assert spec.type == URN_A
+
+
+async def test_prefetch_uses_options_of_device(hass, hass_entry, spec_server, monkeypatch):
+    monkeypatch.setattr(MiotSpec, 'SPEC_HOSTS', [base_url(spec_server)])
+    monkeypatch.setitem(DEVICE_CUSTOMIZES, 'test.plug.a', {'trans_options': False})
+    clear_customizes_cache()
+    entry = hass_entry(trans_options=True)
+    devices = [
+        {'did': '1', 'model': 'test.plug.a', 'urn': URN_A},
+        {'did': '2', 'model': 'test.plug.b', 'urn': URN_B},
+    ]
+    await entry.async_prefetch_specs(devices)
+    clear_customizes_cache()
+    types = hass.data[DOMAIN]['miot_spec_types']
+    assert (URN_A, False) in types
+    assert (URN_B, True) in types
+    assert (URN_A, True) not in types